@@ -15,7 +15,7 @@ router = APIRouter(prefix="/alerts", tags=["Alerts"])
 
 
 @router.get("", response_model=List[AlertResponse])
-async def get_alerts(
+def get_alerts(
     active_only: bool = Query(True, description="Return only unresolved alerts"),
     severity: str = Query(None, description="Filter by severity (high, critical)"),
     limit: int = Query(100, ge=1, le=1000),
@@ -42,7 +42,7 @@ async def get_alerts(
 
 
 @router.post("/{alert_id}/acknowledge", response_model=AlertResponse)
-async def acknowledge_alert(
+def acknowledge_alert(
     alert_id: int,
     payload: AlertAcknowledge = AlertAcknowledge(),
     db: Session = Depends(get_db),
@@ -68,7 +68,7 @@ async def acknowledge_alert(
 
 
 @router.post("/{alert_id}/resolve", response_model=AlertResponse)
-async def resolve_alert(
+def resolve_alert(
     alert_id: int,
     payload: AlertResolve,
     db: Session = Depends(get_db),
@@ -94,7 +94,7 @@ async def resolve_alert(
 
 
 @router.get("/stats", response_model=dict)
-async def get_alert_statistics(
+def get_alert_statistics(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
@@ -1,9 +1,10 @@
 """
 Alert service for managing alerts
 """
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import List
+from typing import Any, Dict, List, Optional
 import logging
 
 from app.alerts.models import Alert
@@ -11,6 +12,25 @@ from app.risk.models import Risk
 
 logger = logging.getLogger(__name__)
 
+_ALERT_TABLE = Alert.__table__
+_ALERT_INSERT = insert(_ALERT_TABLE).returning(_ALERT_TABLE.c.id, sort_by_parameter_order=True)
+# SQLite: one multi-row INSERT, ids sorted afterwards (see app/streaming/risk_writer.py)
+_ALERT_INSERT_UNORDERED = insert(_ALERT_TABLE).returning(_ALERT_TABLE.c.id)
+
+
+def _commit_loaded(db: Session, alert: Alert) -> None:
+    """
+    Commit changes to an alert loaded in this session, keeping its state
+    
+    Status updates only set columns whose values we already hold; none are
+    generated by the database.  Detaching the flushed alert before the
+    commit keeps its attributes from being expired, so serializing the
+    response needs no refresh SELECT.
+    """
+    db.flush()
+    db.expunge(alert)
+    db.commit()
+
 
 class AlertService:
     """Service for alert management"""
@@ -32,30 +52,124 @@ class AlertService:
         Returns:
             Created alert
         """
-        severity = "critical" if risk.risk_score >= 0.9 else "high"
+        return AlertService.create_alert_for_assessment(
+            db,
+            risk_id=risk.id,
+            entity_type=risk.entity_type,
+            entity_id=risk.entity_id,
+            risk_score=risk.risk_score,
+            risk_level=risk.risk_level,
+            risk_factors=risk.risk_factors,
+            alert_type=alert_type,
+        )
+    
+    @staticmethod
+    def create_alert_for_assessment(
+        db: Session,
+        risk_id: int,
+        entity_type: str,
+        entity_id: str,
+        risk_score: float,
+        risk_level: str,
+        risk_factors: Optional[List[str]],
+        alert_type: str = "threshold"
+    ) -> Alert:
+        """
+        Create an alert from plain assessment values
         
-        message = f"High risk detected for {risk.entity_type} {risk.entity_id}"
+        Used by the streaming pipeline, which inserts risks through SQLAlchemy
+        Core and never holds a Risk ORM instance.
         
+        Args:
+            db: Database session
+            risk_id: ID of the persisted risk assessment
+            entity_type: Type of the assessed entity
+            entity_id: ID of the assessed entity
+            risk_score: Composite risk score
+            risk_level: Classified risk level
+            risk_factors: Contributing risk factors
+            alert_type: Type of alert
+            
+        Returns:
+            Created alert
+        """
         alert = Alert(
-            risk_id=risk.id,
+            risk_id=risk_id,
             alert_type=alert_type,
-            severity=severity,
-            message=message,
+            severity=AlertService.alert_severity(risk_score),
+            message=f"High risk detected for {entity_type} {entity_id}",
             details={
-                "risk_score": risk.risk_score,
-                "risk_level": risk.risk_level,
-                "risk_factors": risk.risk_factors
+                "risk_score": risk_score,
+                "risk_level": risk_level,
+                "risk_factors": risk_factors
             }
         )
         
         db.add(alert)
+        # The flush assigns the id; no refresh SELECT after the commit — the
+        # expired attributes reload lazily only if the caller reads them.
+        db.flush()
+        alert_id = alert.id
         db.commit()
-        db.refresh(alert)
         
-        logger.info(f"Alert created: {alert.id} for risk {risk.id}")
+        logger.info(f"Alert created: {alert_id} for risk {risk_id}")
         
         return alert
     
+    @staticmethod
+    def alert_severity(risk_score: float) -> str:
+        """Severity assigned to an alert for the given risk score"""
+        return "critical" if risk_score >= 0.9 else "high"
+    
+    @staticmethod
+    def create_alerts_for_assessments(
+        db: Session,
+        assessments: List[Dict[str, Any]],
+        alert_type: str = "threshold"
+    ) -> List[int]:
+        """
+        Insert alerts for many assessments in one statement
+        
+        Used by the streaming writer.  Alerts are written with a single Core
+        ``INSERT ... RETURNING id`` inside the caller's transaction — no ORM
+        instances and no per-alert commit/refresh round trips.  The caller
+        commits.
+        
+        There is no per-alert policy to evaluate or cache here: the writer
+        decides which rows alert with one vectorised level comparison over
+        the batch (``RiskEngine.level_codes``), and what remains per alert
+        is a severity threshold and one f-string.
+        
+        Args:
+            db: Database session
+            assessments: Dicts with id (the risk ID), entity_type, entity_id,
+                risk_score, risk_level and risk_factors
+            alert_type: Type of alert
+            
+        Returns:
+            Created alert IDs, in the order of ``assessments``
+        """
+        if not assessments:
+            return []
+        
+        params = [
+            {
+                "risk_id": a["id"],
+                "alert_type": alert_type,
+                "severity": AlertService.alert_severity(a["risk_score"]),
+                "message": f"High risk detected for {a['entity_type']} {a['entity_id']}",
+                "details": {
+                    "risk_score": a["risk_score"],
+                    "risk_level": a["risk_level"],
+                    "risk_factors": a["risk_factors"]
+                },
+            }
+            for a in assessments
+        ]
+        if db.get_bind().dialect.name == "sqlite":
+            return sorted(db.execute(_ALERT_INSERT_UNORDERED, params).scalars().all())
+        return db.execute(_ALERT_INSERT, params).scalars().all()
+    
     @staticmethod
     def acknowledge_alert(
         db: Session,
@@ -82,8 +196,7 @@ class AlertService:
             alert.acknowledged_by = user_id
             alert.acknowledged_at = datetime.utcnow()
             
-            db.commit()
-            db.refresh(alert)
+            _commit_loaded(db, alert)
             
             logger.info(f"Alert {alert_id} acknowledged by user {user_id}")
         
@@ -116,8 +229,7 @@ class AlertService:
             alert.resolved_at = datetime.utcnow()
             alert.resolution_notes = resolution_notes
             
-            db.commit()
-            db.refresh(alert)
+            _commit_loaded(db, alert)
             
             logger.info(f"Alert {alert_id} resolved by user {user_id}")
         
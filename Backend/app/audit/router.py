@@ -29,7 +29,7 @@ class AuditLogResponse(BaseModel):
 
 
 @router.get("/logs", response_model=List[AuditLogResponse])
-async def get_audit_logs(
+def get_audit_logs(
     action: Optional[str] = None,
     user_id: Optional[int] = None,
     entity_id: Optional[str] = None,
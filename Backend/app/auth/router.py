@@ -13,7 +13,7 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(
+def register(
     user_in: UserCreate,
     db: Session = Depends(get_db)
 ):
@@ -30,7 +30,7 @@ async def register(
 
 
 @router.post("/login", response_model=Token)
-async def login(
+def login(
     user_login: UserLogin,
     db: Session = Depends(get_db)
 ):
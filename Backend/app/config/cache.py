@@ -0,0 +1,139 @@
+"""
+Process-local cache for system configuration reads.
+
+The current SystemConfiguration row changes only when an admin updates it,
+yet every config read used to query the database.  Reads now go through
+``config_cache``: a dict held by each worker and keyed by name.  The entries
+are dropped whenever the configuration changes.
+
+Invalidation is versioned.  ``invalidate()`` bumps the version and clears
+the dict.  A value loaded under an older version is returned to its caller
+but not stored, so a read racing with an update can never re-insert the
+configuration it replaced.
+
+With several workers, one worker's update must reach all the others.  When
+Redis is available, ``invalidate()`` also publishes on
+``settings.CONFIG_INVALIDATION_CHANNEL``.  Every worker runs a listener
+thread (``start_listener``) that clears its own cache when a message arrives.
+Without Redis the cache works per process only, which is exact for the
+default single-worker deployment.
+"""
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# ── Detect Redis availability ────────────────────────────────────────────────
+try:
+    import redis
+    _REDIS_AVAILABLE = True
+except ImportError:
+    _REDIS_AVAILABLE = False
+    logger.info("redis not installed — config cache invalidation is per-process only.")
+
+
+class ConfigCache:
+    """
+    Versioned name → value cache with optional Redis pub/sub invalidation.
+
+    Usage:
+        cfg = config_cache.get("current", lambda: load_from_db(db))
+        config_cache.invalidate()          # after writing a new configuration
+    """
+
+    MAX_ENTRIES = 256
+
+    def __init__(self):
+        self._cache: Dict[str, Any] = {}
+        self._version = 0
+        self._lock = threading.Lock()
+        self._redis = None
+        self._listener: Optional[threading.Thread] = None
+        self._bypass = False
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, name: str, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for ``name``, calling ``loader`` on a miss."""
+        if self._bypass:
+            return loader()
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+        version = self._version
+        value = loader()
+        with self._lock:
+            # Only keep values loaded under the version that is still current
+            if version == self._version and len(self._cache) < self.MAX_ENTRIES:
+                self._cache[name] = value
+        return value
+
+    def invalidate_local(self) -> None:
+        """Drop every entry cached by this process."""
+        with self._lock:
+            self._version += 1
+            self._cache.clear()
+
+    def invalidate(self) -> None:
+        """Drop local entries and tell the other workers to drop theirs."""
+        self.invalidate_local()
+        client = self._client()
+        if client is None:
+            return
+        try:
+            client.publish(settings.CONFIG_INVALIDATION_CHANNEL, str(self._version))
+        except Exception as exc:
+            logger.warning("Config invalidation publish failed: %s", exc)
+
+    # ── Redis listener ──────────────────────────────────────────────────────
+    def start_listener(self) -> None:
+        """Subscribe to the invalidation channel on a daemon thread."""
+        if self._listener is not None and self._listener.is_alive():
+            return
+        client = self._client()
+        if client is None:
+            return
+        try:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(settings.CONFIG_INVALIDATION_CHANNEL)
+        except Exception as exc:
+            # Other workers' updates can't reach us, so don't cache at all
+            logger.warning("Redis unavailable, config cache disabled: %s", exc)
+            self._redis = None
+            self._bypass = True
+            return
+        self._listener = threading.Thread(
+            target=self._listen, args=(pubsub,), daemon=True, name="config-invalidation",
+        )
+        self._listener.start()
+        logger.info("✓ Listening for config invalidations on %s", settings.CONFIG_INVALIDATION_CHANNEL)
+
+    def _listen(self, pubsub) -> None:
+        try:
+            for message in pubsub.listen():
+                if message.get("type") == "message":
+                    self.invalidate_local()
+        except Exception as exc:
+            # Without the channel, updates made on other workers would go
+            # unnoticed, so stop caching here rather than serve stale values.
+            logger.error("Config invalidation listener stopped: %s", exc)
+            self._redis = None
+            self._bypass = True
+            self.invalidate_local()
+
+    def _client(self):
+        if not _REDIS_AVAILABLE or not settings.CONFIG_CACHE_REDIS:
+            return None
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(settings.REDIS_URL, socket_connect_timeout=1)
+        return self._redis
+
+
+# Global cache shared by the config router
+config_cache = ConfigCache()
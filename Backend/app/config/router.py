@@ -7,6 +7,7 @@ import logging
 
 from app.config.schemas import ConfigResponse, ConfigUpdateRequest, SystemConfig, RiskThresholds, StreamingConfig, AlertConfig
 from app.config.models import SystemConfiguration
+from app.config.cache import config_cache
 from app.core.dependencies import get_current_user, get_current_active_admin
 from db.session import get_db
 from app.core.config import settings
@@ -28,6 +29,17 @@ def _get_current_config(db: Session) -> SystemConfiguration:
     return config
 
 
+def _cached_config(db: Session) -> ConfigResponse:
+    """
+    Current configuration as served by GET /config, from the process cache
+    when it is warm.  ``validate`` still reads the row itself so it can
+    report stored values that would not pass the response schema.
+    """
+    return config_cache.get(
+        "current", lambda: _config_to_response(_get_current_config(db))
+    )
+
+
 def _config_to_response(db_config: SystemConfiguration) -> ConfigResponse:
     """Convert database model to API response"""
     system_config = SystemConfig(
@@ -60,7 +72,7 @@ def _config_to_response(db_config: SystemConfiguration) -> ConfigResponse:
 
 
 @router.get("", response_model=ConfigResponse, summary="Get current system configuration")
-async def get_config(
+def get_config(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
@@ -70,8 +82,7 @@ async def get_config(
     **Available to**: All authenticated users (read-only)
     """
     try:
-        config = _get_current_config(db)
-        return _config_to_response(config)
+        return _cached_config(db)
     except Exception as e:
         logger.error(f"Error fetching config: {e}")
         raise HTTPException(
@@ -81,7 +92,7 @@ async def get_config(
 
 
 @router.put("", response_model=ConfigResponse, summary="Update system configuration", status_code=status.HTTP_200_OK)
-async def update_config(
+def update_config(
     config_update: ConfigUpdateRequest,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_admin)
@@ -134,6 +145,7 @@ async def update_config(
         # Commit changes
         db.commit()
         db.refresh(current_config)
+        config_cache.invalidate()
         
         logger.info(f"Configuration updated by user: {current_user.username}")
         return _config_to_response(current_config)
@@ -148,7 +160,7 @@ async def update_config(
 
 
 @router.get("/validate", summary="Validate configuration")
-async def validate_config(
+def validate_config(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
@@ -22,6 +22,12 @@ class Settings(BaseSettings):
     # Server
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    # permessage-deflate compresses every broadcast frame once per client;
+    # off by default since all clients receive the same pre-serialized payload
+    WS_PER_MESSAGE_DEFLATE: bool = False
+    # Send broadcasts as binary frames of UTF-8 JSON, skipping the per-client
+    # str → bytes re-encode; clients must decode binary frames
+    WS_BINARY_FRAMES: bool = False
 
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
@@ -30,11 +36,27 @@ class Settings(BaseSettings):
 
     # Database - Using SQLite for development (easier setup)
     DATABASE_URL: str = "sqlite:///./risk_management.db"
+    # Connection pool for server databases (PostgreSQL etc.).  Each streaming
+    # writer shard holds one connection for its lifetime (its audit entries
+    # commit with its risk rows); the rest serve request handlers.  Pre-ping
+    # costs a round trip per checkout — with it off, set DB_POOL_RECYCLE_S
+    # below the server's idle timeout so stale connections are still replaced.
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE_S: int = -1           # -1 = never recycle
+    # SQLite file databases: synchronous=NORMAL under WAL, so commits skip the
+    # per-transaction fsync.  Still corruption-safe, but the last transactions
+    # can be lost on power failure (not on a process crash).  Opt-in.
+    SQLITE_SYNCHRONOUS_NORMAL: bool = False
 
     # Redis
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
+    # Broadcast config-cache invalidations to other workers (app/config/cache.py)
+    CONFIG_CACHE_REDIS: bool = False
+    CONFIG_INVALIDATION_CHANNEL: str = "risk_config:invalidate"
 
     @property
     def REDIS_URL(self) -> str:
@@ -55,6 +77,18 @@ class Settings(BaseSettings):
     # Streaming
     PATHWAY_MONITORING: bool = True
     STREAM_BUFFER_SIZE: int = 1000
+    STREAM_BATCH_SIZE: int = 64           # rows per DB flush
+    STREAM_FLUSH_INTERVAL_MS: int = 250   # max time a row waits before flush
+    STREAM_INGEST_COMMIT_MS: int = 50     # max time an event waits for Pathway
+    STREAM_WRITER_SHARDS: int = 1         # concurrent DB writers (PostgreSQL)
+    # PostgreSQL: risk-writer commits don't wait for the WAL flush
+    # (synchronous_commit=off for its transactions only).  A crash can lose
+    # the last few hundred ms of stream rows, never corrupt or half-apply them.
+    # Opt-in: off, every stream commit is durable.
+    STREAM_ASYNC_COMMIT: bool = False
+    # Skip "high" alerts for an entity already alerted within this many
+    # seconds (critical ones always alert); 0 alerts on every high/critical risk
+    STREAM_ALERT_DEDUPE_S: float = 0.0
 
     # AI/RAG (Google Gemini - Free API)
     GEMINI_API_KEY: Optional[str] = None
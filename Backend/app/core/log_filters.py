@@ -0,0 +1,47 @@
+"""
+Logging filters for high-rate code paths
+"""
+import logging
+import threading
+import time
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let at most ``rate`` records per second at or above ``level`` through.
+
+    Meant for per-event error logging on the streaming path: when something
+    fails for every event (e.g. the database is down) the log gets a steady
+    trickle of full tracebacks instead of thousands per second.  The next
+    record let through after a burst reports how many were dropped.
+    Records below ``level`` are never limited.
+
+    Usage:
+        logger.addFilter(RateLimitFilter(rate=10))
+    """
+
+    def __init__(self, rate: float = 10.0, level: int = logging.ERROR):
+        super().__init__()
+        self.rate = rate
+        self.level = level
+        self._tokens = rate
+        self._last = time.monotonic()
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.level:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens < 1.0:
+                self._suppressed += 1
+                return False
+            self._tokens -= 1.0
+            suppressed, self._suppressed = self._suppressed, 0
+        if suppressed:
+            record.msg = f"{record.getMessage()} [{suppressed} similar records suppressed]"
+            record.args = ()
+        return True
@@ -2,6 +2,7 @@
 Explainability router for risk explanations
 """
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
@@ -37,8 +38,10 @@ async def explain_risk(
     
     - **risk_id**: ID of the risk assessment to explain
     """
-    # Get risk from database
-    risk = db.query(Risk).filter(Risk.id == request.risk_id).first()
+    # Get risk from database (in the threadpool — the query blocks)
+    risk = await run_in_threadpool(
+        lambda: db.query(Risk).filter(Risk.id == request.risk_id).first()
+    )
     
     if not risk:
         raise HTTPException(status_code=404, detail="Risk assessment not found")
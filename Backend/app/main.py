@@ -18,6 +18,7 @@ from app.config.router import router as config_router
 from app.market.router import router as market_router
 from app.websocket.manager import websocket_manager
 from app.streaming.pathway_pipeline import pathway_pipeline
+from app.config.cache import config_cache
 from db.session import init_db
 
 # Configure logging
@@ -47,18 +48,25 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"✗ Database initialization failed: {e}")
     
+    # Drop cached configuration when another worker updates it
+    config_cache.start_listener()
+    
     # Connect WebSocket manager to pipeline for real-time broadcasting
     pathway_pipeline.set_websocket_manager(websocket_manager)
     
     # Hand the *running* asyncio event loop to the pipeline so its daemon
-    # threads can schedule WebSocket coroutines via run_coroutine_threadsafe().
+    # threads can hand WebSocket messages over via loop.call_soon_threadsafe().
     # asyncio.get_running_loop() is the only safe, reliable way to obtain the
     # current event loop from an async context (works in Python 3.7–3.13+).
     import asyncio as _aio
     _loop = _aio.get_running_loop()
     pathway_pipeline.set_event_loop(_loop)
+    logger.info(f"✓ Event loop: {type(_loop).__module__}.{type(_loop).__name__}")
     
-    # Start streaming pipeline in background thread
+    # Start streaming pipeline in background thread.  It stays off the event
+    # loop on purpose: pw.run() blocks, and scoring plus DB writes are CPU and
+    # blocking I/O.  Only finished frames cross over, batched per writer flush
+    # and coalesced into loop wake-ups (WebSocketManager.publish_threadsafe).
     logger.info("Starting streaming pipeline...")
     try:
         pipeline_thread = threading.Thread(
@@ -103,7 +111,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include routers
+# Include routers.  Handlers that block (database queries, password hashing)
+# are plain ``def``: FastAPI runs them in its threadpool, so they never stall
+# the event loop that serves the WebSocket stream.
 app.include_router(auth_router, prefix=settings.API_PREFIX)
 app.include_router(risk_router, prefix=settings.API_PREFIX)
 app.include_router(alerts_router, prefix=settings.API_PREFIX)
@@ -155,10 +165,13 @@ async def websocket_risk_stream(websocket: WebSocket):
     WebSocket endpoint for real-time risk updates.
 
     Clients connect here to receive live risk assessments and alerts.
-    The handler keeps the connection alive by responding to "ping"
-    with "pong" (used by the frontend heartbeat).
+    Connecting with ``?features=false`` drops each risk's raw feature dict
+    from the stream (much smaller frames).  The handler keeps the
+    connection alive by responding to "ping" with "pong" (used by the
+    frontend heartbeat).
     """
-    await websocket_manager.connect(websocket)
+    features = websocket.query_params.get("features", "true").lower() not in ("0", "false", "no")
+    await websocket_manager.connect(websocket, features=features)
 
     try:
         while True:
@@ -187,5 +200,6 @@ if __name__ == "__main__":
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.DEBUG,
+        ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE,
         log_level="info"
     )
@@ -7,15 +7,89 @@ Supports two scoring modes:
                    liquidity + session risk (activated when market features are present).
 """
 import numpy as np
-from typing import Dict, List, Tuple, Any
+from types import MappingProxyType
+from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime
 import logging
 
 from app.core.config import settings
+from app.risk import engine_numba
+from app.risk.engine_numba import (
+    FACTOR_VELOCITY, FACTOR_AMOUNT, FACTOR_ANOMALY, FACTOR_REPUTATION,
+    FACTOR_UNUSUAL, FACTOR_BLACKLIST, FACTOR_IMPLIED_VOL, FACTOR_GAMMA,
+    FACTOR_DELTA, FACTOR_OFF_HOURS, FACTOR_PRICE_MOVE,
+)
 
 logger = logging.getLogger(__name__)
 
 
+# ── Risk-factor bitmask ──────────────────────────────────────────────────────
+# Every factor trigger is one FACTOR_* bit (defined next to the kernels that
+# set them); bit order is the order in which factors are reported.  Each
+# formatter receives the value that tripped its bit (None for the boolean
+# flags), as returned by _factor_values().
+_FACTOR_FORMATTERS = (
+    lambda v: f"High transaction velocity ({v}/hr — threshold 50/hr)",
+    lambda a: f"Large transaction amount (₹{a:,.0f})",
+    lambda a: f"Statistical anomaly detected (score={a:.3f}, >0.7 threshold)",
+    lambda r: f"Low entity reputation ({r:.1%})",
+    lambda _: "Unusual behavioural pattern flagged (+15% score boost)",
+    lambda _: "BLACKLIST MATCH — entity on bad-actor registry (score ≥ 0.95)",
+    lambda iv: (
+        f"High implied volatility ({iv:.1%} — "
+        f"{'EXTREME' if iv > 0.50 else 'ELEVATED'}; normal baseline <15%)"
+    ),
+    lambda g: f"High gamma exposure (γ={g:.5f} — rapid MTM risk near expiry)",
+    lambda d: f"High directional delta exposure (|Δ|={d:.4f})",
+    lambda s: (
+        f"Off-hours trading (session={s.upper()}) — "
+        "elevated gap and liquidity risk"
+    ),
+    lambda p: (
+        f"Large intraday price move ({p:+.2f}%) — "
+        "potential circuit-breaker territory"
+    ),
+)
+
+# Reported when no factor bit is set
+_COMPOSITE_FACTOR = "Composite model score ({:.3f}) exceeds threshold"
+
+
+def _factor_values(features: Dict[str, Any]) -> Tuple[Any, ...]:
+    """The value each factor bit reports for ``features``, in bit order."""
+    get = features.get
+    return (
+        get("velocity", 0),
+        get("amount", 0),
+        get("anomaly_score", 0.0),
+        get("reputation", 1.0),
+        None,
+        None,
+        float(get("implied_vol", 0.0)),
+        abs(float(get("gamma", 0.0))),
+        abs(float(get("delta", 0.0))),
+        get("market_session", "open"),
+        abs(float(get("price_change_pct", 0.0))),
+    )
+
+
+def decode_factor_mask(mask: int, values: Tuple[Any, ...]) -> List[str]:
+    """
+    Turn a factor bitmask into human-readable factor strings.
+
+    ``values[i]`` is the feature value reported for bit ``i``.  Set bits are
+    visited lowest-first (isolate the low bit, format, clear it), so the
+    output order matches identify_risk_factors().
+    """
+    factors: List[str] = []
+    while mask:
+        low = mask & -mask
+        i = low.bit_length() - 1
+        factors.append(_FACTOR_FORMATTERS[i](values[i]))
+        mask ^= low
+    return factors
+
+
 class RiskEngine:
     """
     Real-time risk scoring engine.
@@ -49,10 +123,40 @@ class RiskEngine:
     # Blend ratio: 70% transaction, 30% market (only when market features present)
     _MARKET_BLEND = 0.30
 
+    # Gap risk per trading session; unknown sessions score _SESSION_RISK_DEFAULT.
+    # Built once here rather than as a dict literal inside _market_score().
+    _SESSION_RISK = MappingProxyType({
+        "open":     0.0,
+        "pre_open": 0.5,
+        "closed":   1.0,
+    })
+    _SESSION_RISK_DEFAULT = 0.2
+
+    # Risk levels in ascending order — indexed by batch level codes
+    _LEVEL_NAMES = ("low", "medium", "high", "critical")
+    # Level codes at or above this one raise an alert ("high", "critical")
+    ALERT_LEVEL_CODE = 2
+    ALERT_LEVELS = frozenset(_LEVEL_NAMES[ALERT_LEVEL_CODE:])
+
+    # Presence of any of these keys activates the market sub-model
+    _MARKET_KEYS = ("delta", "gamma", "implied_vol", "spot_price", "bid_ask_spread")
+
+    # Every feature key the scoring path reads (scores, levels and factors).
+    # Other simulator fields only ride along for persistence, so the
+    # streaming pipeline ships just these to its scoring step.
+    SCORING_KEYS = (
+        "velocity", "amount", "anomaly_score", "reputation",
+        "unusual_pattern", "blacklist_match",
+        "implied_vol", "gamma", "delta", "spot_price", "bid_ask_spread",
+        "liquidity_score", "market_session", "price_change_pct",
+    )
+
     def __init__(self):
         self.high_threshold   = settings.RISK_HIGH_THRESHOLD
         self.medium_threshold = settings.RISK_MEDIUM_THRESHOLD
         self.low_threshold    = settings.RISK_LOW_THRESHOLD
+        # Batch scoring kernel with the weights baked in as constants
+        self._batch_scorer = engine_numba.make_batch_scorer(self.batch_weights())
 
     # ── Core transaction risk score ─────────────────────────────────────────
     def _transaction_score(self, features: Dict[str, Any]) -> float:
@@ -80,6 +184,16 @@ class RiskEngine:
 
         return min(score, 1.0)
 
+    # ── Market feature detection ────────────────────────────────────────────
+    def has_market_features(self, features: Dict[str, Any]) -> bool:
+        """
+        Return True if the features carry any market/derivatives data.
+
+        The batch path evaluates this once per event while packing, into the
+        block's ``has_market`` flag, so its kernel never re-scans the dict.
+        """
+        return any(k in features for k in self._MARKET_KEYS)
+
     # ── Market / derivatives risk sub-model ─────────────────────────────────
     def _market_score(self, features: Dict[str, Any]) -> float:
         """
@@ -94,8 +208,7 @@ class RiskEngine:
           session_risk     – Pre-open / closed hours → gap risk.
           price_change_risk– Large intraday moves → potential circuit-breaker trigger.
         """
-        market_keys = {"delta", "gamma", "implied_vol", "spot_price", "bid_ask_spread"}
-        if not any(k in features for k in market_keys):
+        if not self.has_market_features(features):
             return 0.0   # no market data — market sub-score is zero
 
         w = self._MARKET_WEIGHTS
@@ -132,7 +245,7 @@ class RiskEngine:
 
         # ── Session risk ──────────────────────────────────────────────────────
         session = features.get("market_session", "open")
-        session_risk = {"open": 0.0, "pre_open": 0.5, "closed": 1.0}.get(session, 0.2)
+        session_risk = self._SESSION_RISK.get(session, self._SESSION_RISK_DEFAULT)
         score += session_risk * w["session_risk"]
 
         # ── Intraday price change risk ─────────────────────────────────────────
@@ -193,71 +306,115 @@ class RiskEngine:
         """
         Return a list of human-readable risk-factor strings explaining the score.
         Covers both transaction and market-specific triggers.
-        """
-        factors: List[str] = []
-
-        # ── Transaction factors ───────────────────────────────────────────────
-        if features.get("velocity", 0) > 50:
-            v = features["velocity"]
-            factors.append(f"High transaction velocity ({v}/hr — threshold 50/hr)")
-
-        if features.get("amount", 0) > 5_000:
-            a = features["amount"]
-            factors.append(f"Large transaction amount (₹{a:,.0f})")
-
-        if features.get("anomaly_score", 0) > 0.7:
-            a = features["anomaly_score"]
-            factors.append(f"Statistical anomaly detected (score={a:.3f}, >0.7 threshold)")
 
-        if features.get("reputation", 1.0) < 0.5:
-            r = features["reputation"]
-            factors.append(f"Low entity reputation ({r:.1%})")
-
-        if features.get("unusual_pattern"):
-            factors.append("Unusual behavioural pattern flagged (+15% score boost)")
-
-        if features.get("blacklist_match"):
-            factors.append("BLACKLIST MATCH — entity on bad-actor registry (score ≥ 0.95)")
-
-        # ── Market / derivatives factors ──────────────────────────────────────
-        iv = float(features.get("implied_vol", 0.0))
-        if iv > 0.30:
-            severity = "EXTREME" if iv > 0.50 else "ELEVATED"
-            factors.append(
-                f"High implied volatility ({iv:.1%} — {severity}; "
-                "normal baseline <15%)"
-            )
-
-        gamma = abs(float(features.get("gamma", 0.0)))
-        if gamma > 0.03:
-            factors.append(
-                f"High gamma exposure (γ={gamma:.5f} — rapid MTM risk near expiry)"
-            )
-
-        delta = abs(float(features.get("delta", 0.0)))
-        if delta > 0.75:
-            factors.append(
-                f"High directional delta exposure (|Δ|={delta:.4f})"
-            )
+        The triggers set the same FACTOR_* bits as the batch kernels, and
+        the strings come from decode_factor_mask(), as in assess_batch().
+        """
+        values = _factor_values(features)
+        velocity, amount, anomaly, reputation, _, _, iv, gamma, delta, session, pct = values
+        mask = (
+            (velocity > 50) << FACTOR_VELOCITY
+            | (amount > 5_000) << FACTOR_AMOUNT
+            | (anomaly > 0.7) << FACTOR_ANOMALY
+            | (reputation < 0.5) << FACTOR_REPUTATION
+            | bool(features.get("unusual_pattern")) << FACTOR_UNUSUAL
+            | bool(features.get("blacklist_match")) << FACTOR_BLACKLIST
+            | (iv > 0.30) << FACTOR_IMPLIED_VOL
+            | (gamma > 0.03) << FACTOR_GAMMA
+            | (delta > 0.75) << FACTOR_DELTA
+            | (session != "open") << FACTOR_OFF_HOURS
+            | (pct >= 3.0) << FACTOR_PRICE_MOVE
+        )
+        return decode_factor_mask(mask, values) or [_COMPOSITE_FACTOR.format(risk_score)]
 
-        session = features.get("market_session", "open")
-        if session != "open":
-            factors.append(
-                f"Off-hours trading (session={session.upper()}) — "
-                "elevated gap and liquidity risk"
-            )
+    # ── Batch assessment (compiled kernel) ───────────────────────────────────
+    def level_cuts(self) -> np.ndarray:
+        """
+        Ascending score cut-points for branchless batch classification.
 
-        pct = abs(float(features.get("price_change_pct", 0.0)))
-        if pct >= 3.0:
-            factors.append(
-                f"Large intraday price move ({pct:+.2f}%) — "
-                "potential circuit-breaker territory"
-            )
+        ``np.searchsorted(cuts, scores, side="right")`` counts the cuts at or
+        below each score, giving an index into _LEVEL_NAMES.  Clamping each
+        cut to the one above it reproduces classify_risk_level()'s if/elif
+        precedence even if thresholds are configured out of order.
+        """
+        high = min(self.high_threshold, 0.90)
+        medium = min(self.medium_threshold, high)
+        return np.array([medium, high, 0.90], dtype=np.float64)
+
+    def level_codes(self, scores) -> np.ndarray:
+        """Classify an array of rounded scores into _LEVEL_NAMES indices."""
+        return np.searchsorted(self.level_cuts(), scores, side="right")
+
+    def batch_weights(self) -> np.ndarray:
+        """Weight vector (W_* layout) for ``engine_numba.make_batch_scorer``."""
+        t, m = self._TXN_WEIGHTS, self._MARKET_WEIGHTS
+        return np.array(
+            [
+                t["velocity"], t["amount"], t["anomaly_score"], t["reputation"],
+                m["implied_vol"], m["gamma_risk"], m["delta_risk"],
+                m["liquidity_risk"], m["session_risk"], m["price_change_risk"],
+                self._MARKET_BLEND,
+            ],
+            dtype=np.float64,
+        )
 
-        if not factors:
-            factors.append(f"Composite model score ({risk_score:.3f}) exceeds threshold")
+    def assess_batch(
+        self,
+        features_batch: List[Dict[str, Any]],
+        out: Optional[np.ndarray] = None,
+    ) -> List[Optional[Tuple[float, str, List[str]]]]:
+        """
+        Assess many events with one call into the batch kernel.
+
+        Each event becomes one column of ``out`` — a structure-of-arrays
+        (N_FEATURES, capacity) float64 buffer, allocated when omitted or too
+        small — with all columns written by a single NumPy conversion.  The
+        block is scored by the weight-specialised batch kernel, then rounded,
+        classified and its factor bitmask decoded.  Results match
+        calculate_risk_score(), classify_risk_level() and
+        identify_risk_factors() event for event.
+
+        An event whose scoring features are not finite numbers (a ``None``
+        packs as NaN) gets ``None`` instead of a result: its score would be
+        NaN, which classifies as "critical".
+        """
+        n = len(features_batch)
+        if out is None or out.shape[1] < n:
+            out = np.empty((engine_numba.N_FEATURES, n), dtype=np.float64)
+        X = out[:, :n]
+        # Per-row callables bound once, outside the loops below
+        has_market = self.has_market_features
+        feature_row = engine_numba.feature_row
+        session_risk, session_default = self._SESSION_RISK, self._SESSION_RISK_DEFAULT
+        engine_numba.pack_batch(
+            [feature_row(f, has_market(f), session_risk, session_default) for f in features_batch],
+            X,
+        )
 
-        return factors
+        raw_scores, masks = self._batch_scorer(X)
+        scores = [round(raw, 6) for raw in raw_scores.tolist()]
+        level_codes = self.level_codes(scores).tolist()
+        finite = np.isfinite(X).all(axis=0)
+        if finite.all():
+            finite = None   # common case: skip the per-event test below
+
+        level_names = self._LEVEL_NAMES
+        results: List[Optional[Tuple[float, str, List[str]]]] = []
+        for i, (features, score, code, mask) in enumerate(
+            zip(features_batch, scores, level_codes, masks.tolist())
+        ):
+            if finite is not None and not finite[i]:
+                results.append(None)
+                continue
+            level = level_names[code]
+            if mask:
+                factors = decode_factor_mask(mask, _factor_values(features))
+            else:
+                factors = [_COMPOSITE_FACTOR.format(score)]
+            results.append((score, level, factors))
+
+        logger.debug("Risk batch assessed — %d events", n)
+        return results
 
     # ── Full assessment entrypoint ───────────────────────────────────────────
     def assess_risk(
@@ -267,14 +424,17 @@ class RiskEngine:
         features: Dict[str, Any],
     ) -> Tuple[float, str, List[str]]:
         """
-        Perform a complete risk assessment.
+        Perform a complete risk assessment: a batch of one for assess_batch().
 
         Returns:
             (risk_score, risk_level, risk_factors)
+
+        Raises ValueError if a scoring feature is not a finite number.
         """
-        risk_score   = self.calculate_risk_score(features)
-        risk_level   = self.classify_risk_level(risk_score)
-        risk_factors = self.identify_risk_factors(features, risk_score)
+        result = self.assess_batch([features])[0]
+        if result is None:
+            raise ValueError(f"non-numeric scoring features for {entity_type}:{entity_id}")
+        risk_score, risk_level, risk_factors = result
 
         logger.info(
             "Risk assessed — %s:%s  score=%.4f  level=%s  factors=%d",
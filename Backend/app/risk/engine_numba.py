@@ -0,0 +1,335 @@
+"""
+Batch risk-scoring kernel.
+
+Scores a whole batch of events in one call over a dense feature block
+instead of one call per event.  The kernel computes, per row, exactly what
+``RiskEngine.calculate_risk_score`` and ``identify_risk_factors`` do — the
+composite score (before its 6-dp rounding) and the factor bitmask — so
+streaming batches and single assessments always agree.
+
+When Numba is installed the kernel is compiled to machine code
+(``@njit(parallel=True, nogil=True)``: events spread over cores with
+``prange``, GIL released while it runs) with the scoring weights folded in as
+constants, once per weight set, when the scorer is built — so the first real
+batch pays no JIT cost.  The generated source is written to a file named by
+its hash so Numba's on-disk cache applies: later processes with the same
+weights load the machine code instead of compiling it again.  Without Numba
+an equivalent NumPy implementation is used.
+
+The matrix is float64: scores are persisted and compared against thresholds,
+so the batch path must be bit-identical to the per-event path.  For the same
+reason ``fastmath`` is left off — re-associating the weighted sums changes
+the last bits of the score — and the final rounding is left to the caller:
+``np.round`` scales by 10**6 and can land one ulp away from Python's
+correctly-rounded ``round()``, flipping the sixth decimal.
+
+The block is laid out structure-of-arrays: shape (N_FEATURES, n), one
+contiguous row per feature, so every feature the kernels read is a stride-1
+column across the batch.  Feature order (see ``feature_row``):
+    velocity, amount, anomaly_score, reputation, unusual_pattern,
+    blacklist_match, has_market, implied_vol, gamma, delta, has_spread,
+    bid_ask_spread | liquidity_score, session_risk, off_hours, price_change_pct
+
+Numeric features are packed raw.  Their preprocessing — absolute values,
+spread/liquidity → liquidity risk, clipping and scaling — happens inside the
+kernels, in the same pass that computes the score, so no normalised copy of
+the block is ever written.
+"""
+import hashlib
+import importlib.util
+import logging
+import os
+import sys
+import tempfile
+from typing import Any, Callable, Dict, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ── Detect Numba availability ────────────────────────────────────────────────
+try:
+    from numba import njit, prange
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+    logger.info("Numba not installed — batch risk scoring uses the NumPy kernel.")
+
+
+# ── Feature rows of the SoA block ─────────────────────────────────────────────
+COL_VELOCITY       = 0
+COL_AMOUNT         = 1
+COL_ANOMALY        = 2
+COL_REPUTATION     = 3
+COL_UNUSUAL        = 4
+COL_BLACKLIST      = 5
+COL_HAS_MARKET     = 6
+COL_IMPLIED_VOL    = 7
+COL_GAMMA          = 8
+COL_DELTA          = 9
+COL_HAS_SPREAD     = 10
+COL_LIQUIDITY      = 11
+COL_SESSION_RISK   = 12
+COL_OFF_HOURS      = 13
+COL_PRICE_MOVE     = 14
+N_FEATURES         = 15
+
+# ── Risk-factor bits of the kernels' masks (decoded by engine.decode_factor_mask)
+FACTOR_VELOCITY    = 0
+FACTOR_AMOUNT      = 1
+FACTOR_ANOMALY     = 2
+FACTOR_REPUTATION  = 3
+FACTOR_UNUSUAL     = 4
+FACTOR_BLACKLIST   = 5
+FACTOR_IMPLIED_VOL = 6
+FACTOR_GAMMA       = 7
+FACTOR_DELTA       = 8
+FACTOR_OFF_HOURS   = 9
+FACTOR_PRICE_MOVE  = 10
+
+# ── Weight vector layout (built by RiskEngine.batch_weights) ─────────────────
+W_VELOCITY, W_AMOUNT, W_ANOMALY, W_REPUTATION = 0, 1, 2, 3
+W_IMPLIED_VOL, W_GAMMA, W_DELTA, W_LIQUIDITY, W_SESSION, W_PRICE = 4, 5, 6, 7, 8, 9
+W_BLEND = 10
+N_WEIGHTS = 11
+
+
+def feature_row(
+    features: Dict[str, Any],
+    has_market: bool,
+    session_risk: Dict[str, float],
+    session_risk_default: float,
+) -> Tuple[Any, ...]:
+    """Return one event's raw features in block order (one column of the batch)."""
+    get = features.get
+    has_spread = "bid_ask_spread" in features
+    session = get("market_session", "open")
+    return (
+        get("velocity", 0),
+        get("amount", 0),
+        get("anomaly_score", 0.0),
+        get("reputation", 1.0),
+        1.0 if get("unusual_pattern") else 0.0,
+        1.0 if get("blacklist_match") else 0.0,
+        1.0 if has_market else 0.0,
+        get("implied_vol", 0.0),
+        get("gamma", 0.0),
+        get("delta", 0.0),
+        1.0 if has_spread else 0.0,
+        features["bid_ask_spread"] if has_spread else get("liquidity_score", 1.0),
+        session_risk.get(session, session_risk_default),
+        0.0 if session == "open" else 1.0,
+        get("price_change_pct", 0.0),
+    )
+
+
+def pack_batch(rows: Sequence[Tuple[Any, ...]], out: np.ndarray) -> None:
+    """
+    Fill the (N_FEATURES, len(rows)) block ``out`` from ``feature_row`` tuples.
+
+    The whole list goes through one NumPy conversion into the transposed
+    view, instead of one small tuple-to-column assignment per event.
+    """
+    if rows:
+        out.T[...] = rows
+
+
+def _score_batch_numpy(
+    features: np.ndarray, weights: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorised NumPy kernel (used when Numba is unavailable)."""
+    X, w = features, weights
+    gamma = np.abs(X[COL_GAMMA])
+    delta = np.abs(X[COL_DELTA])
+    price_move = np.abs(X[COL_PRICE_MOVE])
+    liquidity = np.where(
+        X[COL_HAS_SPREAD] != 0.0,
+        np.minimum(X[COL_LIQUIDITY] / 0.5, 1.0),
+        1.0 - X[COL_LIQUIDITY],
+    )
+    txn = np.minimum(
+        np.minimum(X[COL_VELOCITY] / 100.0, 1.0) * w[W_VELOCITY]
+        + np.minimum(X[COL_AMOUNT] / 10_000.0, 1.0) * w[W_AMOUNT]
+        + X[COL_ANOMALY] * w[W_ANOMALY]
+        + (1.0 - X[COL_REPUTATION]) * w[W_REPUTATION],
+        1.0,
+    )
+    mkt = np.minimum(
+        np.minimum(np.maximum(X[COL_IMPLIED_VOL] - 0.10, 0.0) / 0.40, 1.0) * w[W_IMPLIED_VOL]
+        + np.minimum(gamma / 0.05, 1.0) * w[W_GAMMA]
+        + np.minimum(delta, 1.0) * w[W_DELTA]
+        + liquidity * w[W_LIQUIDITY]
+        + X[COL_SESSION_RISK] * w[W_SESSION]
+        + np.minimum(price_move / 5.0, 1.0) * w[W_PRICE],
+        1.0,
+    )
+    mkt = np.where(X[COL_HAS_MARKET] != 0.0, mkt, 0.0)
+
+    score = np.where(mkt > 0.0, (1.0 - w[W_BLEND]) * txn + w[W_BLEND] * mkt, txn)
+    score = np.where(X[COL_BLACKLIST] != 0.0, np.maximum(score, 0.95), score)
+    score = np.where(X[COL_UNUSUAL] != 0.0, np.minimum(score + 0.15, 1.0), score)
+    scores = np.minimum(score, 1.0)
+
+    masks = (
+        (X[COL_VELOCITY] > 50).astype(np.int64) << FACTOR_VELOCITY
+        | (X[COL_AMOUNT] > 5_000).astype(np.int64) << FACTOR_AMOUNT
+        | (X[COL_ANOMALY] > 0.7).astype(np.int64) << FACTOR_ANOMALY
+        | (X[COL_REPUTATION] < 0.5).astype(np.int64) << FACTOR_REPUTATION
+        | (X[COL_UNUSUAL] != 0.0).astype(np.int64) << FACTOR_UNUSUAL
+        | (X[COL_BLACKLIST] != 0.0).astype(np.int64) << FACTOR_BLACKLIST
+        | (X[COL_IMPLIED_VOL] > 0.30).astype(np.int64) << FACTOR_IMPLIED_VOL
+        | (gamma > 0.03).astype(np.int64) << FACTOR_GAMMA
+        | (delta > 0.75).astype(np.int64) << FACTOR_DELTA
+        | (X[COL_OFF_HOURS] != 0.0).astype(np.int64) << FACTOR_OFF_HOURS
+        | (price_move >= 3.0).astype(np.int64) << FACTOR_PRICE_MOVE
+    )
+    return scores, masks
+
+
+# ── Weight-specialised compiled kernel (source template) ─────────────────────
+# Weights are spliced in as float literals by make_batch_scorer(), so Numba
+# constant-folds them instead of loading them from an array on every row; the
+# COL_* rows and FACTOR_* bits are spliced in the same way.
+_NUMBA_KERNEL_TEMPLATE = """
+def _score_batch_kernel(X):
+    n = X.shape[1]
+    scores = np.empty(n, dtype=np.float64)
+    masks = np.empty(n, dtype=np.int64)
+    for i in prange(n):
+        gamma = abs(X[{COL_GAMMA}, i])
+        delta = abs(X[{COL_DELTA}, i])
+        price_move = abs(X[{COL_PRICE_MOVE}, i])
+        txn = min(
+            min(X[{COL_VELOCITY}, i] / 100.0, 1.0) * {w_velocity}
+            + min(X[{COL_AMOUNT}, i] / 10_000.0, 1.0) * {w_amount}
+            + X[{COL_ANOMALY}, i] * {w_anomaly}
+            + (1.0 - X[{COL_REPUTATION}, i]) * {w_reputation},
+            1.0,
+        )
+        mkt = 0.0
+        if X[{COL_HAS_MARKET}, i] != 0.0:
+            if X[{COL_HAS_SPREAD}, i] != 0.0:
+                liquidity = min(X[{COL_LIQUIDITY}, i] / 0.5, 1.0)
+            else:
+                liquidity = 1.0 - X[{COL_LIQUIDITY}, i]
+            mkt = min(
+                min(max(X[{COL_IMPLIED_VOL}, i] - 0.10, 0.0) / 0.40, 1.0) * {w_implied_vol}
+                + min(gamma / 0.05, 1.0) * {w_gamma}
+                + min(delta, 1.0) * {w_delta}
+                + liquidity * {w_liquidity}
+                + X[{COL_SESSION_RISK}, i] * {w_session}
+                + min(price_move / 5.0, 1.0) * {w_price},
+                1.0,
+            )
+        if mkt > 0.0:
+            score = (1.0 - {w_blend}) * txn + {w_blend} * mkt
+        else:
+            score = txn
+        if X[{COL_BLACKLIST}, i] != 0.0:
+            score = max(score, 0.95)
+        if X[{COL_UNUSUAL}, i] != 0.0:
+            score = min(score + 0.15, 1.0)
+        scores[i] = min(score, 1.0)
+
+        m = 0
+        if X[{COL_VELOCITY}, i] > 50:
+            m |= 1 << {FACTOR_VELOCITY}
+        if X[{COL_AMOUNT}, i] > 5_000:
+            m |= 1 << {FACTOR_AMOUNT}
+        if X[{COL_ANOMALY}, i] > 0.7:
+            m |= 1 << {FACTOR_ANOMALY}
+        if X[{COL_REPUTATION}, i] < 0.5:
+            m |= 1 << {FACTOR_REPUTATION}
+        if X[{COL_UNUSUAL}, i] != 0.0:
+            m |= 1 << {FACTOR_UNUSUAL}
+        if X[{COL_BLACKLIST}, i] != 0.0:
+            m |= 1 << {FACTOR_BLACKLIST}
+        if X[{COL_IMPLIED_VOL}, i] > 0.30:
+            m |= 1 << {FACTOR_IMPLIED_VOL}
+        if gamma > 0.03:
+            m |= 1 << {FACTOR_GAMMA}
+        if delta > 0.75:
+            m |= 1 << {FACTOR_DELTA}
+        if X[{COL_OFF_HOURS}, i] != 0.0:
+            m |= 1 << {FACTOR_OFF_HOURS}
+        if price_move >= 3.0:
+            m |= 1 << {FACTOR_PRICE_MOVE}
+        masks[i] = m
+    return scores, masks
+"""
+
+BatchScorer = Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+# Generated kernel modules live here, one file per distinct source
+_KERNEL_DIR = os.path.join(tempfile.gettempdir(), "risk-engine-kernels")
+_KERNEL_HEADER = "import numpy as np\nfrom numba import prange\n"
+
+
+def _load_kernel_source(src: str) -> Tuple[Callable, bool]:
+    """
+    Define ``_score_batch_kernel`` from ``src``; return it and whether it is
+    file-backed (and so cacheable by Numba).
+
+    The file name is the hash of its content and an existing file is never
+    rewritten, so Numba's cache index — keyed on the file's path and
+    timestamp — stays valid across restarts.  If the directory is not
+    writable the source is exec'd in memory and compiled uncached.
+    """
+    digest = hashlib.sha1(src.encode()).hexdigest()[:16]
+    path = os.path.join(_KERNEL_DIR, f"batch_kernel_{digest}.py")
+    try:
+        if not os.path.exists(path):
+            os.makedirs(_KERNEL_DIR, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=_KERNEL_DIR, suffix=".tmp")
+            with os.fdopen(fd, "w") as fh:
+                fh.write(_KERNEL_HEADER + src)
+            os.replace(tmp, path)   # atomic: concurrent workers never see half a file
+        spec = importlib.util.spec_from_file_location(f"_risk_batch_kernel_{digest}", path)
+        module = importlib.util.module_from_spec(spec)
+        # Registered so Numba can resolve the kernel's globals when it
+        # loads the function from its cache
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+        return module._score_batch_kernel, True
+    except OSError as exc:
+        logger.warning("Batch kernel cache unavailable (%s) — compiling in memory.", exc)
+    namespace: Dict[str, Any] = {"np": np, "prange": prange}
+    exec(compile(src, "<risk-engine:batch-kernel>", "exec"), namespace)
+    return namespace["_score_batch_kernel"], False
+
+
+def make_batch_scorer(weights: Sequence[float]) -> BatchScorer:
+    """
+    Build a batch scorer with ``weights`` (laid out as W_*) baked in.
+
+    With Numba, the kernel source is generated with the weights as float
+    literals and compiled once, here, with ``prange`` over events — the same
+    partial evaluation RiskEngine applies to its scalar transaction kernel.
+    The compiled code is cached on disk (see ``_load_kernel_source``).
+    Without Numba the NumPy kernel is returned bound to the weights.
+
+    The returned callable takes an (N_FEATURES, n) block and returns
+    (unrounded scores, factor bitmasks).
+    """
+    weights = tuple(float(w) for w in weights)
+    if len(weights) != N_WEIGHTS:
+        raise ValueError(f"expected {N_WEIGHTS} weights, got {len(weights)}")
+
+    if not _NUMBA_AVAILABLE:
+        w = np.array(weights, dtype=np.float64)
+        return lambda features: _score_batch_numpy(features, w)
+
+    names = ("w_velocity", "w_amount", "w_anomaly", "w_reputation",
+             "w_implied_vol", "w_gamma", "w_delta", "w_liquidity",
+             "w_session", "w_price", "w_blend")
+    src = _NUMBA_KERNEL_TEMPLATE.format(
+        **{name: repr(w) for name, w in zip(names, weights)},
+        **{k: v for k, v in globals().items() if k.startswith(("COL_", "FACTOR_"))},
+    )
+    func, cacheable = _load_kernel_source(src)
+    # nogil: the streaming threads call this; releasing the GIL while it runs
+    # leaves the interpreter to the event loop and the other pipeline threads
+    kernel = njit(parallel=True, nogil=True, cache=cacheable)(func)
+    kernel(np.zeros((N_FEATURES, 1)))   # compile now, not on the first live batch
+    return kernel
+
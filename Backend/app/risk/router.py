@@ -1,7 +1,8 @@
 """
 Risk router (API endpoints)
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
@@ -15,12 +16,24 @@ from datetime import datetime
 router = APIRouter(prefix="/risk", tags=["Risk Management"])
 logger = logging.getLogger(__name__)
 
+# Built once at import: validates and dumps a whole list of risks in one
+# pydantic-core pass instead of FastAPI re-validating every row through
+# response_model.  Used by the list endpoints that return up to 1000 rows.
+_RISK_LIST_ADAPTER = TypeAdapter(List[RiskResponse])
+_RISK_LIST_RESPONSES = {200: {"model": List[RiskResponse]}}
 
-@router.get("/demo", response_model=List[RiskResponse])
-async def get_demo_risks(
-    limit: int = Query(50, ge=1, le=1000)
-):
-    """Demo endpoint with mock risk data (no auth required)"""
+
+def _risk_list_response(risks) -> Response:
+    """Serialize Risk rows (or equivalent dicts) straight to a JSON response."""
+    items = _RISK_LIST_ADAPTER.validate_python(risks, from_attributes=True)
+    return Response(
+        content=_RISK_LIST_ADAPTER.dump_json(items),
+        media_type="application/json",
+    )
+
+
+def _demo_risks():
+    """Mock risk rows served when there is no real data yet"""
     return [
         {
             "id": 1,
@@ -49,8 +62,16 @@ async def get_demo_risks(
     ]
 
 
-@router.get("/live", response_model=List[RiskResponse])
-async def get_live_risks(
+@router.get("/demo", response_model=List[RiskResponse])
+async def get_demo_risks(
+    limit: int = Query(50, ge=1, le=1000)
+):
+    """Demo endpoint with mock risk data (no auth required)"""
+    return _demo_risks()
+
+
+@router.get("/live", response_model=None, responses=_RISK_LIST_RESPONSES)
+def get_live_risks(
     limit: int = Query(50, ge=1, le=1000),
     risk_level: Optional[str] = None,
     db: Session = Depends(get_db)
@@ -67,16 +88,16 @@ async def get_live_risks(
         risks = query.limit(limit).all()
         if not risks:
             # Return demo data if no real data
-            return await get_demo_risks(limit)
-        return risks
+            return _risk_list_response(_demo_risks())
+        return _risk_list_response(risks)
     except Exception as e:
         logger.error(f"Database error: {e}")
         # Fallback to demo data
-        return await get_demo_risks(limit)
+        return _risk_list_response(_demo_risks())
 
 
-@router.get("/history", response_model=List[RiskResponse])
-async def get_risk_history(
+@router.get("/history", response_model=None, responses=_RISK_LIST_RESPONSES)
+def get_risk_history(
     entity_id: Optional[str] = None,
     entity_type: Optional[str] = None,
     skip: int = Query(0, ge=0),
@@ -101,11 +122,11 @@ async def get_risk_history(
         query = query.filter(Risk.entity_type == entity_type)
     
     risks = query.offset(skip).limit(limit).all()
-    return risks
+    return _risk_list_response(risks)
 
 
 @router.get("/stats", response_model=dict)
-async def get_risk_statistics(
+def get_risk_statistics(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_analyst)
 ):
@@ -136,7 +157,7 @@ async def get_risk_statistics(
 
 
 @router.get("/{risk_id}", response_model=RiskResponse)
-async def get_risk_by_id(
+def get_risk_by_id(
     risk_id: int,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
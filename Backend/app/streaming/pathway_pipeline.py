@@ -4,7 +4,7 @@ Pathway streaming pipeline for real-time risk processing.
 Uses the Pathway framework (https://pathway.com) for true reactive streaming:
   - pw.io.python.ConnectorSubject  → ingests simulated market events
   - pw.Schema subclass             → declares table schema
-  - pw.apply()                     → real-time risk scoring on each row
+  - pw.udf(max_batch_size=…)       → real-time risk scoring, batched per time step
   - pw.io.subscribe / pw.io.python.write → outputs results to DB + WebSocket
 
 Falls back to a threading-based loop on platforms where Pathway is unavailable
@@ -21,11 +21,11 @@ Pathway data-flow (Linux / Docker):
           ▼  pw.io.python.read(subject, schema=_EventSchema)
     pw.Table[_EventSchema]
           │
-          ▼  pw.apply(_score_row, ...)     ← pure function, no I/O
-    pw.Table[result: str]                 ← single JSON blob per row
+          ▼  _score_rows UDF (batched)     ← pure function, no I/O
+    pw.Table[entity_id, entity_type, scored: (score, level, factors)]
           │
           ▼  pw.io.subscribe / pw.io.python.write  ← sink callback
-    _on_risk_output()              ← parse JSON, write DB, WebSocket
+    _on_risk_output()              ← write DB, WebSocket
 
 Event-loop threading contract
 ──────────────────────────────
@@ -44,19 +44,24 @@ RIGHT:  main.py grabs ``asyncio.get_running_loop()`` during ``lifespan``
 
 import logging
 import threading
+import time
 import asyncio
-import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime
 
+import numpy as np
+
+from app.core import serialization
+from app.core.config import settings
+from app.core.log_filters import RateLimitFilter
 from app.risk.engine import risk_engine
-from app.risk.models import Risk
-from app.alerts.service import AlertService
-from app.audit.router import create_audit_log
+from app.risk.engine_numba import N_FEATURES
+from app.streaming.risk_writer import RiskBatchWriter, RiskRow, ShardedRiskWriter, make_risk_writer
 from app.streaming.simulator import LiveMarketSimulator
-from db.session import SessionLocal
 
 logger = logging.getLogger(__name__)
+# Per-event error paths: cap tracebacks at 10/s if every event starts failing
+logger.addFilter(RateLimitFilter(rate=10))
 
 # ── Detect Pathway availability ──────────────────────────────────────────────
 try:
@@ -71,57 +76,185 @@ except (ImportError, Exception) as _pw_err:
 
 
 # ── Compatibility shim: pw.io.subscribe (≥0.16) vs pw.io.python.write (≥0.14) ─
-def _pathway_subscribe(table, callback) -> None:
-    """
-    Attach a Python sink callback to a Pathway table.
+# Pathway ≥ 0.16 introduced ``pw.io.subscribe`` as the preferred API.  Older
+# 0.14/0.15 builds use ``pw.io.python.write``.  Both accept the same
+# ``on_change(key, row, time, is_addition)`` signature; which one this build
+# has is resolved once, here.
+if PATHWAY_AVAILABLE and hasattr(pw.io, "subscribe"):
+    def _pathway_subscribe(table, callback) -> None:
+        """Attach a Python sink callback to a Pathway table (≥ 0.16)."""
+        pw.io.subscribe(table, on_change=callback)
+elif PATHWAY_AVAILABLE:
+    def _pathway_subscribe(table, callback) -> None:
+        """Attach a Python sink callback to a Pathway table (0.14 / 0.15)."""
+        pw.io.python.write(table, callback)
+else:
+    def _pathway_subscribe(table, callback) -> None:
+        """No Pathway — nothing to attach to."""
+
+
+# ── Pure function: score a batch of event rows — defined at module level so ─
+# ── Pathway can reliably serialize/pickle it if the Rust runtime ever needs to.
+# (risk_score, risk_level, risk_factors) — one typed column, None on failure
+_Scored = Optional[Tuple[float, str, Tuple[str, ...]]]
 
-    Pathway ≥ 0.16 introduced ``pw.io.subscribe`` as the preferred API.
-    Older 0.14/0.15 builds use ``pw.io.python.write``.
-    Both accept the same ``on_change(key, row, time, is_addition)`` signature.
-    """
-    if PATHWAY_AVAILABLE:
-        if hasattr(pw.io, "subscribe"):
-            pw.io.subscribe(table, on_change=callback)          # ≥ 0.16
-        else:
-            pw.io.python.write(table, callback)                  # 0.14 / 0.15
-
-
-# ── Pure function: score one event row — defined at module level so Pathway ──
-# ── can reliably serialize/pickle it if the Rust runtime ever needs to.     ──
-def _score_row(
-    entity_id: str,
-    entity_type: str,
-    features_json: str,
-    timestamp: str,
-) -> str:
-    """
-    Pure transformation function passed to ``pw.apply()``.
 
-    Deserialises the feature JSON, calls the risk engine, and re-serialises
-    the full result as a JSON string.  No I/O, no side-effects — safe for
+def _score_rows(features_jsons: List[str]) -> List[_Scored]:
+    """
+    Pure batch transformation wrapped as a batched ``pw.udf``.
+
+    Pathway hands over every row that arrived in the same time step (up to
+    STREAM_BATCH_SIZE) as a list.  The feature JSONs are decoded and scored
+    with one ``risk_engine.assess_batch`` call; each row gets back a
+    ``(risk_score, risk_level, risk_factors)`` tuple, which the sink reads
+    directly — no result JSON to encode here and parse again there.  Ids
+    and timestamps are not echoed: they stay columns of the table.  If the
+    batch fails every row gets ``None``, and so does a row the engine could
+    not score (non-numeric features).  No I/O, no side-effects — safe for
     Pathway's reactive graph.
     """
     try:
-        features = json.loads(features_json)
-        risk_score, risk_level, risk_factors = risk_engine.assess_risk(
-            entity_id=entity_id,
-            entity_type=entity_type,
-            features=features,
-        )
-        return json.dumps(
-            {
-                "entity_id": entity_id,
-                "entity_type": entity_type,
-                "risk_score": risk_score,
-                "risk_level": risk_level,
-                "risk_factors": risk_factors,
-                "features_json": features_json,
-                "timestamp": timestamp,
-            },
-            default=str,
-        )
+        loads = serialization.loads
+        features_batch = [loads(fj) for fj in features_jsons]
+        results = risk_engine.assess_batch(features_batch)
     except Exception as exc:
-        return json.dumps({"error": str(exc), "entity_id": entity_id})
+        logger.error("Scoring failed for a batch of %d events: %s", len(features_jsons), exc)
+        return [None] * len(features_jsons)
+    scored: List[_Scored] = [
+        None if result is None else (result[0], result[1], tuple(result[2]))
+        for result in results
+    ]
+    rejected = scored.count(None)
+    if rejected:
+        logger.error("Scoring rejected %d events with non-numeric features", rejected)
+    return scored
+
+
+def _tick_wait(stop_event: threading.Event, next_tick: float, interval: float) -> float:
+    """
+    Sleep until ``next_tick`` (a ``time.perf_counter()`` deadline) or until
+    ``stop_event`` is set, and return the tick to schedule from.
+
+    Feeders advance ``next_tick`` by ``interval`` per event, so the rate stays
+    at one event per interval however long each event took to produce —
+    a plain ``wait(interval)`` after the work would drift slower.  When a
+    feeder falls more than a whole interval behind (a GC pause, a blocked
+    writer) the schedule restarts from now instead of bursting to catch up.
+
+    The schedule runs on ``perf_counter``: it is monotonic as well, but
+    unlike ``time.monotonic()`` on Windows (~16 ms ticks) it resolves
+    the millisecond intervals the fallback pipeline is often run at.
+    """
+    now = time.perf_counter()
+    if next_tick < now - interval:
+        next_tick = now
+    stop_event.wait(max(0.0, next_tick - now))
+    return next_tick
+
+
+# ── Feature quantization before persistence ──────────────────────────────────
+# Six decimals keeps every value the simulator deliberately rounds (gamma is
+# the finest, at 6 dp) and strips float noise such as 950.9000000000001 from
+# prices — the bulk of each row's ``features`` JSON.
+_FEATURE_DECIMALS = 6
+
+
+def _quantize_features(features: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of ``features`` with float values rounded for storage."""
+    return {
+        k: round(v, _FEATURE_DECIMALS) if isinstance(v, float) else v
+        for k, v in features.items()
+    }
+
+
+# ── WebSocket messages for persisted rows (shared by both pipelines) ────────
+def _risk_payload(row: RiskRow, features: bool = True) -> Dict[str, Any]:
+    """
+    Client-facing risk record for a row the writer has persisted.
+
+    A plain dict on purpose: orjson encodes dicts faster than ``__slots__``
+    dataclasses, which more than cancels the cheaper construction.  With
+    ``features=False`` the raw feature dict is left out; it is well over
+    half of a record's bytes and most of the frame's encode time.  Encoded
+    features are not memoized per entity: every event carries a new entity
+    id and freshly simulated values, so such a cache would never hit.
+    """
+    row_features = row["features"]
+    created_at = row.get("created_at")
+    payload = {
+        "id": row["id"],
+        "entity_id": row["entity_id"],
+        "entity_type": row["entity_type"],
+        "risk_score": row["risk_score"],
+        "risk_level": row["risk_level"],
+        "confidence": row_features.get("reputation", 0.85),
+        "risk_factors": row["risk_factors"],
+        "source": row["source"],
+        # Serialized natively (RFC 3339) by the shared JSON encoder
+        "timestamp": created_at or datetime.utcnow(),
+    }
+    if features:
+        payload["features"] = row_features
+    return payload
+
+
+def _risk_batch_message(rows: List[RiskRow], features: bool = True) -> Dict[str, Any]:
+    """One ``risk_batch`` frame carrying every row of a writer flush."""
+    return {"type": "risk_batch", "data": [_risk_payload(row, features) for row in rows]}
+
+
+def _publish_rows(manager, loop: asyncio.AbstractEventLoop, rows: List[RiskRow]) -> None:
+    """
+    Broadcast a writer flush as one frame, serialized here off the event
+    loop; the manager coalesces hand-overs into loop wake-ups.  The lean
+    variant (no features) is built only while a client asked for it.
+    """
+    message = manager.serialize(_risk_batch_message(rows))
+    lean = None
+    if manager.has_lean_clients():
+        lean = manager.serialize(_risk_batch_message(rows, features=False))
+    manager.publish_threadsafe(loop, message, lean)
+
+
+class _PipelineBase:
+    """
+    State and writer callbacks shared by both PathwayPipeline classes.
+
+    Counters are bumped from the generator thread and from the writer
+    callbacks, which may run on several shard threads at once, so they are
+    only touched under ``_stats_lock``.
+    """
+
+    def __init__(self):
+        self.simulator = LiveMarketSimulator()
+        self.is_running = False
+        self.events_processed = 0
+        self.errors_count = 0
+        self._stats_lock = threading.Lock()
+        self.websocket_manager = None
+        self._stop_event = threading.Event()
+        # The FastAPI asyncio event loop — set by main.py *before* the
+        # daemon thread starts.  Never captured from inside a worker thread.
+        self._main_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Batched DB writer — created per start_simulation() run
+        self._writer: Optional[Union[RiskBatchWriter, ShardedRiskWriter]] = None
+
+    def set_websocket_manager(self, manager) -> None:
+        """Attach the WebSocket broadcast manager."""
+        self.websocket_manager = manager
+
+    def _on_rows_flushed(self, rows: List[RiskRow]) -> None:
+        """Writer callback: count persisted rows and broadcast them."""
+        with self._stats_lock:
+            self.events_processed += len(rows)
+        manager, loop = self.websocket_manager, self._main_loop
+        if manager and loop and loop.is_running() and manager.get_connection_count():
+            _publish_rows(manager, loop, rows)
+
+    def _on_rows_failed(self, rows: List[RiskRow], exc: Exception) -> None:
+        """Writer callback: a batch was rolled back or its rows rejected."""
+        with self._stats_lock:
+            self.errors_count += len(rows)
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -138,10 +271,18 @@ if PATHWAY_AVAILABLE:
         Pathway uses this to validate and type each ingested row.
         Do NOT put these annotations on the ConnectorSubject class —
         the subject is a data-push handle, not the schema.
+
+        Features travel as one JSON string column on purpose.  Typed float
+        columns for the scoring inputs would each cost a per-row conversion
+        at ingest and again into the UDF, and a ``pw.Json`` column is no
+        cheaper to hand over than the string.  The batched UDF decodes the
+        strings with orjson and packs them into the kernel's feature block
+        in one pass.  The string carries only the keys listed in
+        ``RiskEngine.SCORING_KEYS``, roughly half the simulator's dict.
         """
         entity_id: str
         entity_type: str
-        features_json: str   # JSON-encoded features dict from the simulator
+        features_json: str   # JSON-encoded scoring inputs (RiskEngine.SCORING_KEYS)
         timestamp: str       # ISO-8601 UTC string
 
     # ── ConnectorSubject: the push-API bridge between feeder thread & Pathway ─
@@ -179,7 +320,7 @@ if PATHWAY_AVAILABLE:
             super().close()
 
     # ── PathwayPipeline: builds and runs the dataflow graph ───────────────────
-    class PathwayPipeline:
+    class PathwayPipeline(_PipelineBase):
         """
         Production streaming pipeline powered by the Pathway reactive engine.
 
@@ -192,27 +333,18 @@ if PATHWAY_AVAILABLE:
         """
 
         def __init__(self):
-            self.simulator = LiveMarketSimulator()
-            self.is_running = False
-            self.events_processed = 0
-            self.errors_count = 0
-            self.websocket_manager = None
-            self._stop_event = threading.Event()
+            super().__init__()
             self._subject: Optional[_EventSubject] = None
-            # The FastAPI asyncio event loop — set by main.py *before* the
-            # daemon thread starts.  Never captured from inside a worker thread.
-            self._main_loop: Optional[asyncio.AbstractEventLoop] = None
+            # Feature dicts of events in flight, keyed by entity_id: filled by
+            # the feeder, popped by the sink, so the sink never re-parses the
+            # features JSON it handed to Pathway.
+            self._inflight_features: Dict[str, Dict[str, Any]] = {}
             logger.info("PathwayPipeline initialised (native Pathway engine)")
 
-        def set_websocket_manager(self, manager) -> None:
-            """Attach the WebSocket broadcast manager."""
-            self.websocket_manager = manager
-
         def set_event_loop(self, loop: asyncio.AbstractEventLoop) -> None:
             """
-            Store the FastAPI event loop so the Pathway sink can schedule
-            WebSocket coroutines from the worker thread via
-            ``asyncio.run_coroutine_threadsafe()``.
+            Store the FastAPI event loop so the writer thread can hand
+            WebSocket messages to it via ``loop.call_soon_threadsafe()``.
 
             Must be called from the main async context (lifespan startup)
             *before* ``start_simulation()`` is invoked.
@@ -225,89 +357,42 @@ if PATHWAY_AVAILABLE:
             """
             Called by pw.io.python.write() for every processed output row.
 
-            `row` contains a single column: "result" (JSON string).
-            We parse it once here (instead of 7 separate pw.apply lambdas),
-            persist to DB, fire alerts, and broadcast via WebSocket.
+            `row` has the event's ids, its "features_json" and the "scored"
+            tuple from _score_rows.  We take the features dict the feeder
+            kept for this event — decoding features_json only if it is
+            missing — and queue the row on the batched writer, which persists
+            it, fires alerts, and calls back for the WebSocket broadcast.
             """
             if not is_addition:
                 return  # retraction — ignore (no deletion semantics needed here)
 
             try:
-                # ── Parse the JSON result produced by _score_row ─────────────
-                data = json.loads(row["result"])
-                entity_id       = data["entity_id"]
-                entity_type     = data["entity_type"]
-                risk_score      = data["risk_score"]
-                risk_level      = data["risk_level"]
-                risk_factors    = data["risk_factors"]   # already a list
-                features        = json.loads(data["features_json"])
-
-                # ── Persist to database ──────────────────────────────────────
-                db = SessionLocal()
-                try:
-                    risk = Risk(
-                        entity_id=entity_id,
-                        entity_type=entity_type,
-                        risk_score=risk_score,
-                        risk_level=risk_level,
-                        features=features,
-                        risk_factors=risk_factors,
-                        source="pathway_stream",
-                    )
-                    db.add(risk)
-                    db.commit()
-                    db.refresh(risk)
-
-                    create_audit_log(
-                        db=db,
-                        user_id=None,
-                        action="risk_assessed",
-                        entity_type=entity_type,
-                        entity_id=entity_id,
-                        details={"risk_id": risk.id, "risk_score": risk_score},
-                    )
-
-                    # ── Trigger alert for high/critical risk events ──────────
-                    if risk_level in ("high", "critical"):
-                        alert = AlertService.create_alert_for_risk(db, risk)
-                        logger.warning(
-                            "Alert %s created for %s risk (entity=%s, score=%.3f)",
-                            alert.id, risk_level, entity_id, risk_score,
-                        )
-
-                    # ── Broadcast to WebSocket clients ───────────────────────
-                    if self.websocket_manager:
-                        msg = {
-                            "type": "risk_update",
-                            "data": {
-                                "id": risk.id,
-                                "entity_id": entity_id,
-                                "entity_type": entity_type,
-                                "risk_score": risk_score,
-                                "risk_level": risk_level,
-                                "confidence": features.get("reputation", 0.85),
-                                "features": features,
-                                "risk_factors": risk_factors,
-                                "source": "pathway_stream",
-                                "timestamp": (
-                                    risk.created_at.isoformat()
-                                    if risk.created_at
-                                    else datetime.utcnow().isoformat()
-                                ),
-                            },
-                        }
-                        loop = self._main_loop
-                        if loop and loop.is_running():
-                            asyncio.run_coroutine_threadsafe(
-                                self.websocket_manager.broadcast(msg), loop
-                            )
-
-                    self.events_processed += 1
-                finally:
-                    db.close()
+                entity_id = row["entity_id"]
+                features  = self._inflight_features.pop(entity_id, None)
+                scored    = row["scored"]
+                if scored is None:
+                    with self._stats_lock:   # _score_rows logged the failure
+                        self.errors_count += 1
+                    return
+                risk_score, risk_level, risk_factors = scored
+                if features is None:
+                    features = serialization.loads(row["features_json"])
+                features = _quantize_features(features)
+
+                # ── Hand off to the batched writer (persist + broadcast) ─────
+                self._writer.submit({
+                    "entity_id": entity_id,
+                    "entity_type": row["entity_type"],
+                    "risk_score": risk_score,
+                    "risk_level": risk_level,
+                    "features": features,
+                    "risk_factors": list(risk_factors),
+                    "source": "pathway_stream",
+                })
 
             except Exception as exc:
-                self.errors_count += 1
+                with self._stats_lock:
+                    self.errors_count += 1
                 logger.error("Pathway sink error: %s", exc, exc_info=True)
 
         # ── Build and run the Pathway dataflow graph ─────────────────────────
@@ -318,7 +403,7 @@ if PATHWAY_AVAILABLE:
             Steps:
               1. Create _EventSubject (the push-API ingest handle).
               2. pw.io.python.read() → declares a streaming pw.Table.
-              3. pw.apply(_score_row) → scores every incoming row using the
+              3. _score_rows UDF → scores incoming rows in batches with the
                  module-level pure function (no local redefinition).
               4. _pathway_subscribe() → routes results to our sink callback
                  (compatible with both Pathway ≥0.16 and 0.14/0.15).
@@ -340,49 +425,93 @@ if PATHWAY_AVAILABLE:
 
             logger.info("Building Pathway dataflow graph (tick=%.1fs)…", interval)
 
+            self._writer = make_risk_writer(self._on_rows_flushed, self._on_rows_failed)
+            self._writer.start()
+
             # ── Step 1: Create the ConnectorSubject ──────────────────────────
             self._subject = _EventSubject()
 
             # ── Step 2: Declare the input table from the subject ─────────────
+            # The feeder commits explicitly (see _feed), so Pathway's own
+            # autocommit timer — up to 1.5 s of added latency per event by
+            # default — is switched off.
             input_table = pw.io.python.read(
                 self._subject,
                 schema=_EventSchema,
+                autocommit_duration_ms=None,
             )
 
-            # ── Step 3: Score each row via module-level _score_row ───────────
-            # Using pw.apply() with the module-level function (not a closure)
-            # ensures Pathway can always locate and serialise the function.
+            # ── Step 3: Score rows in batches via module-level _score_rows ───
+            # A batched UDF receives all rows of a time step at once, so the
+            # engine scores them with one kernel call instead of per row.
+            # The row type comes from _score_rows' List[_Scored] annotation
+            score_rows = pw.udf(
+                _score_rows,
+                deterministic=True,
+                max_batch_size=settings.STREAM_BATCH_SIZE,
+            )
+            # Failed rows (scored=None) are not filtered out here: the sink
+            # must still see them to count the error and drop the event's
+            # in-flight features.  Raising from the UDF instead would abort
+            # the Pathway worker.
             scored_table = input_table.select(
-                result=pw.apply(
-                    _score_row,
-                    input_table.entity_id,
-                    input_table.entity_type,
-                    input_table.features_json,
-                    input_table.timestamp,
-                )
+                entity_id=input_table.entity_id,
+                entity_type=input_table.entity_type,
+                features_json=input_table.features_json,
+                scored=score_rows(input_table.features_json),
             )
 
             # ── Step 4: Attach the sink (version-safe shim) ──────────────────
             _pathway_subscribe(scored_table, self._on_risk_output)
 
             # ── Step 5: Feeder thread ─────────────────────────────────────────
+            # Events are committed to Pathway in chunks: a commit is one
+            # engine time step, i.e. one _score_rows batch.  A chunk closes
+            # when it holds STREAM_BATCH_SIZE events or when the next event
+            # would land after its STREAM_INGEST_COMMIT_MS window — so at slow
+            # tick rates every event is committed as soon as it is pushed.
+            # Ticks follow a perf_counter schedule (see _tick_wait).
             def _feed():
                 logger.info("Pathway feeder thread started (interval=%.1fs)", interval)
+                push, commit = self._subject.next, self._subject.commit
+                inflight = self._inflight_features
+                scoring_keys = risk_engine.SCORING_KEYS
+                generate = self.simulator.generate_event
+                batch_size = settings.STREAM_BATCH_SIZE
+                window = settings.STREAM_INGEST_COMMIT_MS / 1000.0
+                pending, deadline = 0, 0.0
+                next_tick = time.perf_counter()
                 while not self._stop_event.is_set():
+                    next_tick += interval   # when the following event is due
                     try:
-                        event = self.simulator.generate_event()
-                        self._subject.next(
+                        event = generate()
+                        features = event["features"]
+                        inflight[event["entity_id"]] = features
+                        # Only the scoring inputs cross into Pathway; the sink
+                        # takes the full dict from ``inflight``.
+                        push(
                             entity_id=event["entity_id"],
                             entity_type=event["entity_type"],
-                            features_json=json.dumps(event["features"], default=str),
+                            features_json=serialization.dumps(
+                                {k: features[k] for k in scoring_keys if k in features},
+                                default=str,
+                            ),
                             timestamp=event["timestamp"],
                         )
+                        if pending == 0:
+                            deadline = time.perf_counter() + window
+                        pending += 1
+                        if pending >= batch_size or next_tick >= deadline:
+                            commit()
+                            pending = 0
                     except Exception as exc:
                         logger.error("Feeder error: %s", exc)
-                    self._stop_event.wait(interval)
+                    next_tick = _tick_wait(self._stop_event, next_tick, interval)
 
                 # Feeder done — close the subject so pw.run() can finish
                 logger.info("Pathway feeder thread stopping; closing subject…")
+                if pending:
+                    commit()
                 self._subject.close()
 
             feeder = threading.Thread(target=_feed, daemon=True, name="pw-feeder")
@@ -396,6 +525,8 @@ if PATHWAY_AVAILABLE:
                 logger.error("Pathway engine error: %s", exc, exc_info=True)
             finally:
                 self.is_running = False
+                self._writer.stop()
+                self._inflight_features.clear()
                 logger.info(
                     "Pathway engine stopped. events_processed=%d errors=%d",
                     self.events_processed,
@@ -413,11 +544,14 @@ if PATHWAY_AVAILABLE:
             )
 
         def get_stats(self) -> Dict[str, Any]:
+            # Read both counters under the lock so error_rate is consistent
+            with self._stats_lock:
+                events, errors = self.events_processed, self.errors_count
             return {
                 "is_running": self.is_running,
-                "events_processed": self.events_processed,
-                "errors_count": self.errors_count,
-                "error_rate": self.errors_count / max(self.events_processed, 1),
+                "events_processed": events,
+                "errors_count": errors,
+                "error_rate": errors / max(events, 1),
                 "engine": "pathway_native",
                 "pathway_version": pw.__version__,
             }
@@ -429,35 +563,27 @@ if PATHWAY_AVAILABLE:
 
 else:
 
-    class PathwayPipeline:  # type: ignore[no-redef]
+    class PathwayPipeline(_PipelineBase):  # type: ignore[no-redef]
         """
         Fallback streaming pipeline for environments where Pathway is unavailable
         (Windows, CI, dev machines without Linux).
 
         Mimics Pathway's data-flow semantics:
-          generate_event() → assess_risk() → persist DB → broadcast WebSocket
+          generate_event() → assess_batch() → persist DB → broadcast WebSocket
 
         Same public interface as the Pathway version — the rest of the codebase
         is completely unaware of which backend is active.
         """
 
         def __init__(self):
-            self.simulator = LiveMarketSimulator()
-            self.is_running = False
-            self.events_processed = 0
-            self.errors_count = 0
-            self.websocket_manager = None
-            self._stop_event = threading.Event()
-            self._main_loop: Optional[asyncio.AbstractEventLoop] = None
+            super().__init__()
+            # Per-thread SoA feature block reused for every batch (see _score_batch)
+            self._feat_local = threading.local()
             logger.info(
                 "PathwayPipeline initialised (threading fallback — "
                 "install Pathway on Linux for native streaming)"
             )
 
-        def set_websocket_manager(self, manager) -> None:
-            """Attach the WebSocket broadcast manager."""
-            self.websocket_manager = manager
-
         def set_event_loop(self, loop: asyncio.AbstractEventLoop) -> None:
             """
             Store the FastAPI event loop for WebSocket broadcasting from threads.
@@ -469,78 +595,46 @@ else:
             self._main_loop = loop
             logger.debug("Event loop registered with PathwayPipeline (fallback).")
 
-        def _process_event(self, event: Dict[str, Any]):
-            """Score one market event, persist to DB, and broadcast."""
-            try:
-                entity_id   = event["entity_id"]
-                entity_type = event["entity_type"]
-                features    = event["features"]
-
-                risk_score, risk_level, risk_factors = risk_engine.assess_risk(
-                    entity_id=entity_id,
-                    entity_type=entity_type,
-                    features=features,
+        def _score_batch(self, rows: List[RiskRow]) -> List[RiskRow]:
+            """
+            Writer ``prepare`` hook: score a whole batch with one kernel call.
+            Returns the rows the engine could not score (non-numeric
+            features), which the writer reports as failed.
+
+            Runs on a writer thread.  With ``STREAM_WRITER_SHARDS`` > 1 every
+            shard calls this hook concurrently (the kernel releases the GIL),
+            so each writer thread packs into its own feature block, kept in
+            ``self._feat_local`` and allocated on the thread's first batch.
+            """
+            buf = getattr(self._feat_local, "buf", None)
+            if buf is None:
+                buf = self._feat_local.buf = np.empty(
+                    (N_FEATURES, settings.STREAM_BATCH_SIZE), dtype=np.float64
                 )
+            results = risk_engine.assess_batch(
+                [row["features"] for row in rows], out=buf
+            )
+            rejected: List[RiskRow] = []
+            for row, result in zip(rows, results):
+                if result is None:
+                    rejected.append(row)
+                    continue
+                row["risk_score"], row["risk_level"], row["risk_factors"] = result
+                row["features"] = _quantize_features(row["features"])
+            return rejected
 
-                db = SessionLocal()
-                try:
-                    risk = Risk(
-                        entity_id=entity_id,
-                        entity_type=entity_type,
-                        risk_score=risk_score,
-                        risk_level=risk_level,
-                        features=features,
-                        risk_factors=risk_factors,
-                        source="fallback_stream",
-                    )
-                    db.add(risk)
-                    db.commit()
-                    db.refresh(risk)
-
-                    create_audit_log(
-                        db=db,
-                        user_id=None,
-                        action="risk_assessed",
-                        entity_type=entity_type,
-                        entity_id=entity_id,
-                        details={"risk_id": risk.id, "risk_score": risk_score},
-                    )
-
-                    if risk_level in ("high", "critical"):
-                        AlertService.create_alert_for_risk(db, risk)
-
-                    if self.websocket_manager:
-                        msg = {
-                            "type": "risk_update",
-                            "data": {
-                                "id": risk.id,
-                                "entity_id": entity_id,
-                                "entity_type": entity_type,
-                                "risk_score": risk_score,
-                                "risk_level": risk_level,
-                                "confidence": features.get("reputation", 0.85),
-                                "features": features,
-                                "risk_factors": risk_factors,
-                                "source": "fallback_stream",
-                                "timestamp": (
-                                    risk.created_at.isoformat()
-                                    if risk.created_at
-                                    else datetime.utcnow().isoformat()
-                                ),
-                            },
-                        }
-                        loop = self._main_loop
-                        if loop and loop.is_running():
-                            asyncio.run_coroutine_threadsafe(
-                                self.websocket_manager.broadcast(msg), loop
-                            )
-
-                    self.events_processed += 1
-                finally:
-                    db.close()
+        def _process_event(self, event: Dict[str, Any]):
+            """Queue one market event for batched scoring, persist + broadcast."""
+            try:
+                # The simulator's event dict already has entity_id, entity_type
+                # and features, so it travels as the writer row itself —
+                # nothing is copied between generation and scoring.
+                event["source"] = "fallback_stream"
+                self._writer.submit(event)
 
             except Exception as exc:
-                self.errors_count += 1
+                with self._stats_lock:
+                    self.errors_count += 1
                 logger.error("Fallback pipeline error: %s", exc, exc_info=True)
 
         def start_simulation(self, interval: float = 3.0):
@@ -550,6 +644,13 @@ else:
             Runs in a daemon thread (started by app/main.py).
             Calls generate_event() → _process_event() every `interval` seconds,
             using threading.Event.wait() so stop() can interrupt it immediately.
+            Ticks follow a perf_counter schedule, so the time spent on each event
+            does not stretch the interval (see _tick_wait).
+
+            The loop itself only generates and enqueues: scoring and the
+            database round-trip run on the writer thread(s), overlapped with
+            the next ticks, so no extra worker pool sits in front of them.
+            Raise ``STREAM_WRITER_SHARDS`` to score and persist in parallel.
             """
             self.is_running = True
             self._stop_event.clear()
@@ -561,18 +662,26 @@ else:
                 )
 
             logger.info("▶ Fallback streaming engine active (tick=%.1fs)", interval)
+            self._writer = make_risk_writer(
+                self._on_rows_flushed, self._on_rows_failed, prepare=self._score_batch
+            )
+            self._writer.start()
 
+            next_tick = time.perf_counter()
             while not self._stop_event.is_set():
+                next_tick += interval
                 try:
                     event = self.simulator.generate_event()
                     self._process_event(event)
                 except Exception as exc:
-                    self.errors_count += 1
+                    with self._stats_lock:
+                        self.errors_count += 1
                     logger.error("Event generation error: %s", exc)
 
-                self._stop_event.wait(interval)
+                next_tick = _tick_wait(self._stop_event, next_tick, interval)
 
             self.is_running = False
+            self._writer.stop()
             logger.info(
                 "Fallback pipeline stopped. events=%d errors=%d",
                 self.events_processed,
@@ -584,11 +693,14 @@ else:
             self.is_running = False
 
         def get_stats(self) -> Dict[str, Any]:
+            # Read both counters under the lock so error_rate is consistent
+            with self._stats_lock:
+                events, errors = self.events_processed, self.errors_count
             return {
                 "is_running": self.is_running,
-                "events_processed": self.events_processed,
-                "errors_count": self.errors_count,
-                "error_rate": self.errors_count / max(self.events_processed, 1),
+                "events_processed": events,
+                "errors_count": errors,
+                "error_rate": errors / max(events, 1),
                 "engine": "threading_fallback",
                 "pathway_version": None,
             }
@@ -0,0 +1,438 @@
+"""
+Batched persistence for streaming risk assessments.
+
+Both streaming pipelines hand every scored event to a RiskBatchWriter instead
+of writing it inline.  The writer buffers rows and a single flusher thread
+persists the risk rows, their ``risk_assessed`` audit entries and alerts for
+the high/critical ones in one transaction per batch, and hands the persisted
+rows (now carrying ``id`` and ``created_at``) back to the pipeline so it can
+broadcast them.  Auditing in the same commit means a risk is never stored
+without its audit entry, or the reverse, and costs no extra round trip.
+
+A batch is flushed when it reaches ``batch_size`` rows or when its first row
+has waited ``flush_interval`` seconds, whichever comes first, so a slow tick
+rate never delays a row by more than the interval.  A row submitted already
+scored at an alerting level (high/critical) flushes the batch at once: alerts
+skip the wait, while low/medium rows keep batching.  Rows scored by a
+``prepare`` hook have no level when submitted, so the flusher runs the hook
+on rows as it takes them off the buffer, while the batch is still open, and
+flushes at once when one of them scores at an alerting level.
+
+With ``STREAM_ALERT_DEDUPE_S`` set, an entity that keeps scoring "high"
+gets one alert per window instead of one per row; critical rows always
+alert.  Sharding routes an entity to one writer, so each writer's own
+last-alert map sees all of that entity's rows.
+
+With ``STREAM_WRITER_SHARDS`` > 1, ``make_risk_writer`` returns a
+ShardedRiskWriter instead: that many RiskBatchWriters, each with its own
+session, flushing concurrently.  Rows are routed by ``entity_id`` so one
+entity's rows always go through the same writer and stay in order.  This
+pays off on PostgreSQL; SQLite serialises writers on its file lock anyway.
+
+With ``STREAM_ASYNC_COMMIT`` set (off by default), each batch transaction on
+PostgreSQL runs with synchronous_commit off: the commit returns once the WAL
+record is written, and the WAL writer flushes it to disk shortly after, so
+the writer thread never waits on an fsync.  It is scoped with ``SET LOCAL``
+to the writer's own transactions, leaving API requests on the same pool
+fully durable.
+
+Row format (dict), as submitted by the pipelines:
+    entity_id, entity_type, risk_score, risk_level,
+    features, risk_factors, source
+(risk_score/risk_level/risk_factors may instead be filled in by ``prepare``;
+other keys are carried along and ignored.)
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from app.alerts.service import AlertService
+from app.audit.models import AuditLog
+from app.core.config import settings
+from app.core.log_filters import RateLimitFilter
+from app.risk.engine import risk_engine
+from app.risk.models import Risk
+from db.session import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+logger.addFilter(RateLimitFilter(rate=10))
+
+# Streaming rows are plain dicts from the pipeline to the broadcast: never
+# ORM instances (see _insert_risks), and not slots dataclasses either — those
+# build and read no faster here, whereas a dict lets the fallback pipeline
+# submit the simulator's event itself, uncopied, and encodes faster with
+# orjson (see pathway_pipeline._risk_payload).
+RiskRow = Dict[str, Any]
+
+_ALERT_LEVELS = risk_engine.ALERT_LEVELS
+
+
+# ── Append-only risk insert (SQLAlchemy Core) ────────────────────────────────
+_RISK_TABLE = Risk.__table__
+_RISK_RETURNING = (_RISK_TABLE.c.id, _RISK_TABLE.c.created_at)
+_RISK_INSERT = insert(_RISK_TABLE).returning(*_RISK_RETURNING, sort_by_parameter_order=True)
+# SQLite can't order RETURNING rows by parameter, so SQLAlchemy would fall
+# back to one INSERT per row for _RISK_INSERT.  It does assign the rowids of a
+# single multi-row INSERT sequentially in VALUES order (writers are
+# serialised), so there the unordered statement plus a sort by id is exact.
+_RISK_INSERT_UNORDERED = insert(_RISK_TABLE).returning(*_RISK_RETURNING)
+_AUDIT_INSERT = insert(AuditLog.__table__)
+# PostgreSQL: applies to the current transaction only
+_ASYNC_COMMIT = text("SET LOCAL synchronous_commit TO OFF")
+
+
+def _insert_risks(db: Session, rows: List[RiskRow]) -> None:
+    """
+    Insert a batch of streaming risk rows, setting each row's ``id`` and
+    ``created_at``.
+
+    Streaming inserts are append-only, so a Core ``INSERT … RETURNING`` is
+    enough: no ORM instances, no identity-map entries and no follow-up
+    SELECTs.  Executed with the whole parameter list, SQLAlchemy renders it
+    as multi-row ``INSERT … VALUES (…), (…) RETURNING`` ("insertmanyvalues"),
+    so the batch costs one round trip instead of one per row.
+    """
+    if not rows:
+        return
+    params = [
+        {
+            "entity_id": row["entity_id"],
+            "entity_type": row["entity_type"],
+            "risk_score": row["risk_score"],
+            "risk_level": row["risk_level"],
+            "features": row["features"],
+            "risk_factors": row["risk_factors"],
+            "source": row["source"],
+        }
+        for row in rows
+    ]
+    if db.get_bind().dialect.name == "sqlite":
+        returned = sorted(db.execute(_RISK_INSERT_UNORDERED, params).all())
+    else:
+        returned = db.execute(_RISK_INSERT, params).all()
+    for row, (risk_id, created_at) in zip(rows, returned):
+        row["id"], row["created_at"] = risk_id, created_at
+
+
+def _insert_audit_entries(db: Session, rows: List[RiskRow]) -> None:
+    """
+    Insert one ``risk_assessed`` audit entry per inserted risk row, in the
+    caller's transaction, with one multi-row ``INSERT``.  Entries take the
+    risk's own ``created_at``.
+    """
+    if not rows:
+        return
+    db.execute(_AUDIT_INSERT, [
+        {
+            "user_id": None,
+            "action": "risk_assessed",
+            "entity_type": row["entity_type"],
+            "entity_id": row["entity_id"],
+            "details": {"risk_id": row["id"], "risk_score": row["risk_score"]},
+            "ip_address": None,
+            "user_agent": None,
+            "created_at": row["created_at"],
+        }
+        for row in rows
+    ])
+
+
+class RiskBatchWriter:
+    """
+    Buffers scored risk rows and persists them in batches on a daemon thread.
+
+    Usage:
+        writer = RiskBatchWriter(on_flushed=broadcast_rows)
+        writer.start()
+        writer.submit(row)        # from the pipeline thread, never blocks on DB
+        writer.stop()             # flushes whatever is still buffered
+
+    Callbacks run on the writer thread:
+        prepare(rows)             optional; fills in row fields (e.g. batch
+                                  scoring) as rows join the open batch and
+                                  returns the rows it rejects, if any
+        on_flushed(rows)          rows persisted; each has "id" and "created_at"
+        on_failed(rows, exc)      the batch transaction was rolled back,
+                                  or prepare failed or rejected the rows
+
+    At most MAX_PENDING rows wait for the flusher.  Beyond that submit()
+    blocks until the flusher takes the next batch, so a database that falls
+    behind slows the producer down instead of growing the buffer without
+    limit.
+    """
+
+    MAX_PENDING = 10_000
+    # Last-alert entries kept before expired ones are pruned
+    ALERT_DEDUPE_PRUNE = 10_000
+
+    def __init__(
+        self,
+        on_flushed: Callable[[List[RiskRow]], None],
+        on_failed: Optional[Callable[[List[RiskRow], Exception], None]] = None,
+        prepare: Optional[Callable[[List[RiskRow]], Optional[List[RiskRow]]]] = None,
+        batch_size: int = settings.STREAM_BATCH_SIZE,
+        flush_interval: float = settings.STREAM_FLUSH_INTERVAL_MS / 1000.0,
+        name: str = "risk-writer",
+        alert_dedupe_s: float = settings.STREAM_ALERT_DEDUPE_S,
+    ):
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.alert_dedupe_s = alert_dedupe_s
+        # entity_id → monotonic time of its last alert (writer thread only)
+        self._last_alert: Dict[str, float] = {}
+        self._on_flushed = on_flushed
+        self._on_failed = on_failed
+        self._prepare = prepare
+        self._buffer: List[RiskRow] = []
+        self._cond = threading.Condition()
+        self._stopping = False
+        # An alerting row is buffered — flush without waiting for the deadline
+        self._urgent = False
+        self._thread: Optional[threading.Thread] = None
+        # Long-lived session, owned by the writer thread for its whole life
+        self._session: Optional[Session] = None
+        # Batches commit with synchronous_commit off (set in _run)
+        self._async_commit = False
+
+    # ── Producer side ────────────────────────────────────────────────────────
+    def submit(self, row: RiskRow) -> None:
+        """Queue one scored row for the next batch (blocks while the buffer is full)."""
+        with self._cond:
+            while len(self._buffer) >= self.MAX_PENDING and not self._stopping:
+                self._cond.wait()
+            self._buffer.append(row)
+            size = len(self._buffer)
+            # Wake the flusher when a batch starts (to arm its deadline), when
+            # it is full, and when an alert should go out now.  The level test
+            # is one frozenset probe; which rows alert is decided per batch
+            # on integer level codes in _flush.
+            if row.get("risk_level") in _ALERT_LEVELS and not self._urgent:
+                self._urgent = True
+                self._cond.notify_all()
+            elif size == 1 or size >= self.batch_size:
+                self._cond.notify_all()
+
+    # ── Lifecycle ────────────────────────────────────────────────────────────
+    def start(self) -> None:
+        """Start the flusher thread."""
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, daemon=True, name=self.name)
+        self._thread.start()
+        logger.info(
+            "Risk writer %s started (batch_size=%d, flush_interval=%.0fms)",
+            self.name, self.batch_size, self.flush_interval * 1000,
+        )
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush remaining rows and stop the flusher thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # ── Flusher thread ───────────────────────────────────────────────────────
+    def _next_batch(self) -> Optional[List[RiskRow]]:
+        """Block until a batch is due; return None once stopped and drained."""
+        batch: List[RiskRow] = []
+        with self._cond:
+            while not self._buffer and not self._stopping:
+                self._cond.wait()
+            if not self._buffer:
+                return None
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if self._prepare is not None and self._buffer:
+                    batch.extend(self._take_prepared())
+                if len(batch) + len(self._buffer) >= self.batch_size or self._stopping or self._urgent:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if self._prepare is not None:
+                batch.extend(self._take_prepared())
+            else:
+                batch.extend(self._buffer)
+                self._buffer = []
+            self._urgent = False
+            self._cond.notify_all()   # wake producers blocked on a full buffer
+            return batch
+
+    def _take_prepared(self) -> List[RiskRow]:
+        """
+        Take the buffered rows and run ``prepare`` on them, outside the lock
+        (called holding ``self._cond``).  Marks the batch urgent when one of
+        them scores at an alerting level.  Rows whose hook fails, or that it
+        returns as rejected, are reported to ``on_failed`` and dropped.
+        """
+        if not self._buffer:
+            return []
+        rows, self._buffer = self._buffer, []
+        self._cond.notify_all()   # wake producers blocked on a full buffer
+        self._cond.release()
+        try:
+            rejected = self._prepare(rows)
+            if rejected:
+                logger.error("Risk batch prepare rejected %d of %d rows", len(rejected), len(rows))
+                rejected_ids = {id(row) for row in rejected}
+                rows = [row for row in rows if id(row) not in rejected_ids]
+                if self._on_failed:
+                    self._on_failed(rejected, ValueError("rows rejected by prepare"))
+        except Exception as exc:
+            logger.error("Risk batch prepare failed (%d rows): %s", len(rows), exc, exc_info=True)
+            if self._on_failed:
+                self._on_failed(rows, exc)
+            return []
+        finally:
+            self._cond.acquire()
+        if any(row["risk_level"] in _ALERT_LEVELS for row in rows):
+            self._urgent = True
+        return rows
+
+    def _run(self) -> None:
+        # The session is bound to one connection held for the writer's life:
+        # a pooled session would hand its connection back after every commit
+        # and check one out (and pre-ping it) again for the next batch.  If
+        # the database drops it, SQLAlchemy invalidates the connection and
+        # reconnects on the next batch.
+        connection = engine.connect()
+        self._session = SessionLocal(bind=connection)
+        self._async_commit = (
+            settings.STREAM_ASYNC_COMMIT and engine.dialect.name == "postgresql"
+        )
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    break
+                if batch:   # empty when every row failed prepare
+                    self._flush(batch)
+        finally:
+            self._session.close()
+            self._session = None
+            connection.close()
+            logger.info("Risk writer %s stopped", self.name)
+
+    def _dedupe_alerts(self, rows: List[RiskRow]) -> List[RiskRow]:
+        """Drop "high" rows whose entity alerted within ``alert_dedupe_s``."""
+        now = time.monotonic()
+        window = self.alert_dedupe_s
+        last = self._last_alert
+        kept = []
+        for row in rows:
+            entity_id = row["entity_id"]
+            if row["risk_level"] != "critical" and now - last.get(entity_id, -window) < window:
+                continue
+            last[entity_id] = now
+            kept.append(row)
+        if len(last) > self.ALERT_DEDUPE_PRUNE:
+            cutoff = now - window
+            self._last_alert = {k: t for k, t in last.items() if t > cutoff}
+        return kept
+
+    def _flush(self, batch: List[RiskRow]) -> None:
+        """Persist one batch: risks, their audit entries and alerts in one commit."""
+        db = self._session
+        try:
+            if self._async_commit:
+                db.execute(_ASYNC_COMMIT)
+            _insert_risks(db, batch)
+            _insert_audit_entries(db, batch)
+            # Alerts for high/critical rows ride in the same transaction;
+            # picked with one vectorised classification of the batch scores
+            scores = np.fromiter((row["risk_score"] for row in batch), np.float64, len(batch))
+            alert_idx = np.flatnonzero(risk_engine.level_codes(scores) >= risk_engine.ALERT_LEVEL_CODE)
+            alerting = [batch[i] for i in alert_idx.tolist()]
+            if self.alert_dedupe_s > 0 and alerting:
+                alerting = self._dedupe_alerts(alerting)
+            alert_ids = AlertService.create_alerts_for_assessments(db, alerting)
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            logger.error("Risk batch flush failed (%d rows): %s", len(batch), exc, exc_info=True)
+            if self._on_failed:
+                self._on_failed(batch, exc)
+            return
+
+        # One line per batch; the per-alert detail only when DEBUG is on
+        if alert_ids:
+            logger.warning(
+                "%d alerts created for high/critical risks (alert ids %s–%s)",
+                len(alert_ids), alert_ids[0], alert_ids[-1],
+            )
+            if logger.isEnabledFor(logging.DEBUG):
+                for row, alert_id in zip(alerting, alert_ids):
+                    logger.debug(
+                        "Alert %s created for %s risk (entity=%s, score=%.3f)",
+                        alert_id, row["risk_level"], row["entity_id"], row["risk_score"],
+                    )
+
+        self._on_flushed(batch)
+
+
+class ShardedRiskWriter:
+    """
+    Several RiskBatchWriters behind the RiskBatchWriter interface.
+
+    Usage:
+        writer = ShardedRiskWriter(4, on_flushed=broadcast_rows)
+        writer.start()
+        writer.submit(row)        # routed by hash(row["entity_id"])
+        writer.stop()
+
+    Each shard has its own flusher thread and session, so batches commit
+    concurrently (size the connection pool for ``shards`` writers).  The
+    callbacks are shared and run on the shard threads, possibly at the same
+    time.  Ordering holds per entity, not across entities.
+    """
+
+    def __init__(
+        self,
+        shards: int,
+        on_flushed: Callable[[List[RiskRow]], None],
+        on_failed: Optional[Callable[[List[RiskRow], Exception], None]] = None,
+        prepare: Optional[Callable[[List[RiskRow]], Optional[List[RiskRow]]]] = None,
+    ):
+        if shards < 1:
+            raise ValueError(f"shards must be >= 1, got {shards}")
+        self._writers = [
+            RiskBatchWriter(
+                on_flushed, on_failed, prepare,
+                name=f"risk-writer-{i}",
+            )
+            for i in range(shards)
+        ]
+
+    def submit(self, row: RiskRow) -> None:
+        """Queue one row on its entity's shard."""
+        writers = self._writers
+        writers[hash(row["entity_id"]) % len(writers)].submit(row)
+
+    def start(self) -> None:
+        """Start every shard."""
+        for writer in self._writers:
+            writer.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush and stop every shard."""
+        for writer in self._writers:
+            writer.stop(timeout)
+
+
+def make_risk_writer(
+    on_flushed: Callable[[List[RiskRow]], None],
+    on_failed: Optional[Callable[[List[RiskRow], Exception], None]] = None,
+    prepare: Optional[Callable[[List[RiskRow]], Optional[List[RiskRow]]]] = None,
+):
+    """Build the writer configured by STREAM_WRITER_SHARDS."""
+    if settings.STREAM_WRITER_SHARDS > 1:
+        return ShardedRiskWriter(settings.STREAM_WRITER_SHARDS, on_flushed, on_failed, prepare)
+    return RiskBatchWriter(on_flushed, on_failed, prepare)
@@ -7,7 +7,7 @@ and pushes the result into the Pathway dataflow graph.
 """
 import random
 from datetime import datetime, time as dt_time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import time
 import numpy as np
 
@@ -17,6 +17,81 @@ try:
 except Exception:
     _black76 = None
 
+# NSE session boundaries (IST), built once rather than on every event
+_PRE_OPEN = dt_time(9, 0)
+_MARKET_OPEN = dt_time(9, 15)
+_MARKET_CLOSE = dt_time(15, 30)
+# The session is re-derived from the wall clock at most this often, and
+# always at the first read after a boundary (seconds since midnight; the
+# open session includes 15:30:00 itself)
+_SESSION_TTL_S = 30.0
+_SESSION_BOUNDARIES_S = (
+    _PRE_OPEN.hour * 3600 + _PRE_OPEN.minute * 60,
+    _MARKET_OPEN.hour * 3600 + _MARKET_OPEN.minute * 60,
+    _MARKET_CLOSE.hour * 3600 + _MARKET_CLOSE.minute * 60 + 1e-6,
+)
+
+# Option pricing inputs
+_BASE_VOL = {
+    "NIFTY": 0.15, "BANKNIFTY": 0.18, "RELIANCE": 0.25,
+    "TCS": 0.22, "INFY": 0.28, "HDFCBANK": 0.30
+}
+_VOL_MULTIPLIER = {
+    "normal": 1.0, "volatile": 2.0, "trending": 1.2,
+    "gap_up": 1.5, "gap_down": 1.8, "sideways": 0.8
+}
+_RISK_FREE_RATE = 0.065  # RBI repo rate ~6.5%
+
+# (atm_strike, time_to_expiry, volatility, option_type) of the option an
+# event carries Greeks for
+Contract = Tuple[float, float, float, str]
+# One market step, everything an event needs apart from its Greeks:
+# (entity_type, entity_id, symbol, session, volatility_regime, price_data, contract)
+MarketStep = Tuple[str, str, str, str, str, Dict[str, float], Contract]
+
+
+class _RandomPool:
+    """
+    Pre-drawn random numbers for the simulator's per-event draws.
+
+    NumPy fills POOL_SIZE normals or uniforms in one call, converted to a
+    Python list so each draw is a ``list.pop()`` rather than a call into the
+    RNG.  Only the draws that are expensive one at a time go through the
+    pool — a scalar ``np.random.normal``, ``random.randint`` and
+    ``random.choice``.  ``random.random`` and ``random.uniform`` are
+    already as cheap as a pool read and stay stdlib.
+    """
+
+    POOL_SIZE = 4096
+
+    def __init__(self):
+        self._rng = np.random.default_rng()
+        self._normals: List[float] = []
+        self._uniforms: List[float] = []
+
+    def _uniform(self) -> float:
+        try:
+            return self._uniforms.pop()
+        except IndexError:
+            self._uniforms = self._rng.random(self.POOL_SIZE).tolist()
+            return self._uniforms.pop()
+
+    def normal(self, scale: float) -> float:
+        """One draw from N(0, scale²)."""
+        try:
+            return self._normals.pop() * scale
+        except IndexError:
+            self._normals = self._rng.standard_normal(self.POOL_SIZE).tolist()
+            return self._normals.pop() * scale
+
+    def randint(self, a: int, b: int) -> int:
+        """Random integer in [a, b], like ``random.randint``."""
+        return a + int((b - a + 1) * self._uniform())
+
+    def choice(self, seq):
+        """Random element of a non-empty sequence, like ``random.choice``."""
+        return seq[int(len(seq) * self._uniform())]
+
 
 class LiveMarketSimulator:
     """
@@ -38,21 +113,40 @@ class LiveMarketSimulator:
         # Market state tracking for realistic behavior
         self.current_prices = {symbol: random.uniform(100, 25000) for symbol in self.symbols}
         self.volatility_regime = "normal"
+        self._session_expires = 0.0   # time.monotonic() deadline of market_session
         self.market_session = self._get_market_session()
         self.last_price_change = {symbol: 0 for symbol in self.symbols}
+        self._pool = _RandomPool()
     
     def _get_market_session(self) -> str:
-        """Determine if market is open based on current time (IST)"""
+        """
+        Determine if market is open based on current time (IST)
+
+        The wall clock is read at most every _SESSION_TTL_S seconds; in
+        between the last session is returned, checked against a monotonic
+        deadline.  The deadline never runs past the next session boundary,
+        so the cached value changes exactly when the session does.
+        """
+        mono = time.monotonic()
+        if mono < self._session_expires:
+            return self.market_session
+
         now = datetime.now().time()
-        market_open = dt_time(9, 15)  # 9:15 AM IST
-        market_close = dt_time(15, 30)  # 3:30 PM IST
-        
-        if market_open <= now <= market_close:
-            return "open"
-        elif dt_time(9, 0) <= now <= dt_time(9, 15):
-            return "pre_open"
+        if _MARKET_OPEN <= now <= _MARKET_CLOSE:
+            session = "open"
+        elif _PRE_OPEN <= now <= _MARKET_OPEN:
+            session = "pre_open"
         else:
-            return "closed"
+            session = "closed"
+
+        seconds = now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6
+        ttl = _SESSION_TTL_S
+        for boundary in _SESSION_BOUNDARIES_S:
+            if boundary > seconds:
+                ttl = min(ttl, boundary - seconds)
+                break
+        self._session_expires = mono + ttl
+        return session
     
     def _update_market_prices(self, symbol: str) -> Dict[str, float]:
         """Update market prices with realistic tick movements"""
@@ -63,7 +157,7 @@ class LiveMarketSimulator:
         
         # Random walk with drift
         drift = random.uniform(-0.001, 0.001)
-        shock = np.random.normal(0, base_vol)
+        shock = self._pool.normal(base_vol)
         price_change = current_price * (drift + shock)
         
         # Apply tick size constraints (realistic for Indian markets)
@@ -80,51 +174,38 @@ class LiveMarketSimulator:
             "price_change_pct": (price_change / current_price) * 100
         }
     
-    def _calculate_realistic_greeks(self, symbol: str, spot_price: float) -> Dict[str, float]:
-        """Calculate option Greeks using the Black-76 model (simplified fallback if unavailable)."""
+    def _draw_contract(self, symbol: str, spot_price: float) -> Contract:
+        """Pick the ATM option an event carries Greeks for."""
         atm_strike = max(50.0, round(spot_price / 50) * 50)  # ATM strike — nearest 50 (NSE convention)
         time_to_expiry = random.uniform(0.02, 0.25)  # 1 week to 3 months in years
+        volatility = _BASE_VOL.get(symbol, 0.25) * _VOL_MULTIPLIER.get(self.volatility_regime, 1.0)
+        option_type = self._pool.choice(("call", "put"))
+        return atm_strike, time_to_expiry, volatility, option_type
 
-        base_vol = {
-            "NIFTY": 0.15, "BANKNIFTY": 0.18, "RELIANCE": 0.25,
-            "TCS": 0.22, "INFY": 0.28, "HDFCBANK": 0.30
-        }.get(symbol, 0.25)
-        vol_multiplier = {
-            "normal": 1.0, "volatile": 2.0, "trending": 1.2,
-            "gap_up": 1.5, "gap_down": 1.8, "sideways": 0.8
-        }.get(self.volatility_regime, 1.0)
-        volatility = base_vol * vol_multiplier
-
-        option_type = random.choice(["call", "put"])
-        risk_free_rate = 0.065  # RBI repo rate ~6.5%
-
-        # ── Black-76 (primary path) ────────────────────────────────────────
-        if _black76 is not None and time_to_expiry > 0 and volatility > 0:
-            try:
-                g = _black76.calculate_all_greeks(
-                    spot_price=spot_price,
-                    strike_price=atm_strike,
-                    time_to_expiry=time_to_expiry,
-                    volatility=volatility,
-                    risk_free_rate=risk_free_rate,
-                    option_type=option_type,
-                )
-                return {
-                    "delta": round(g["delta"], 4),
-                    "gamma": round(g["gamma"], 6),
-                    "theta": round(g["theta"], 4),
-                    "vega":  round(g["vega"],  4),
-                    "rho":   round(g["rho"],   4),
-                    "implied_vol": round(volatility, 4),
-                    "time_to_expiry": round(time_to_expiry, 4),
-                    "option_price": round(g["price"], 2),
-                    "option_type": option_type,
-                    "strike_price": atm_strike,
-                }
-            except Exception:
-                pass  # fall through to simplified model
+    @staticmethod
+    def _black76_greeks(
+        contract: Contract,
+        price: float, delta: float, gamma: float, vega: float, theta: float, rho: float,
+    ) -> Dict[str, Any]:
+        """Round one contract's Black-76 price and Greeks for the event."""
+        atm_strike, time_to_expiry, volatility, option_type = contract
+        return {
+            "delta": round(delta, 4),
+            "gamma": round(gamma, 6),
+            "theta": round(theta, 4),
+            "vega":  round(vega,  4),
+            "rho":   round(rho,   4),
+            "implied_vol": round(volatility, 4),
+            "time_to_expiry": round(time_to_expiry, 4),
+            "option_price": round(price, 2),
+            "option_type": option_type,
+            "strike_price": atm_strike,
+        }
 
-        # ── Simplified fallback ────────────────────────────────────────────
+    @staticmethod
+    def _simplified_greeks(spot_price: float, contract: Contract) -> Dict[str, float]:
+        """Moneyness-based approximation used when Black-76 is unavailable."""
+        atm_strike, time_to_expiry, volatility, _ = contract
         moneyness = spot_price / atm_strike
         delta = max(-0.99, min(0.99, 2 * (moneyness - 1)))
         gamma = max(0.0001, 0.1 * np.exp(-10 * (moneyness - 1) ** 2))
@@ -140,6 +221,57 @@ class LiveMarketSimulator:
             "implied_vol": round(volatility, 4),
             "time_to_expiry": round(time_to_expiry, 4),
         }
+
+    def _calculate_realistic_greeks(self, spot_price: float, contract: Contract) -> Dict[str, float]:
+        """Calculate option Greeks using the Black-76 model (simplified fallback if unavailable)."""
+        atm_strike, time_to_expiry, volatility, option_type = contract
+
+        # ── Black-76 (primary path) ────────────────────────────────────────
+        if _black76 is not None and time_to_expiry > 0 and volatility > 0:
+            try:
+                g = _black76.calculate_all_greeks(
+                    spot_price=spot_price,
+                    strike_price=atm_strike,
+                    time_to_expiry=time_to_expiry,
+                    volatility=volatility,
+                    risk_free_rate=_RISK_FREE_RATE,
+                    option_type=option_type,
+                )
+                return self._black76_greeks(
+                    contract, g["price"], g["delta"], g["gamma"], g["vega"], g["theta"], g["rho"],
+                )
+            except Exception:
+                pass  # fall through to simplified model
+
+        # ── Simplified fallback ────────────────────────────────────────────
+        return self._simplified_greeks(spot_price, contract)
+
+    def _calculate_greeks_batch(
+        self, spot_prices: List[float], contracts: List[Contract]
+    ) -> List[Dict[str, float]]:
+        """
+        ``_calculate_realistic_greeks`` for many events, with one Black-76
+        kernel call for the whole batch instead of one per event.
+        """
+        if _black76 is not None and contracts:
+            strikes, expiries, vols, types = zip(*contracts)
+            try:
+                g = _black76.calculate_all_greeks_batch(
+                    spot_prices, strikes, expiries, vols, _RISK_FREE_RATE,
+                    [option_type == "call" for option_type in types],
+                )
+            except Exception:
+                pass  # fall through to simplified model
+            else:
+                columns = [g[key].tolist() for key in ("price", "delta", "gamma", "vega", "theta", "rho")]
+                return [
+                    self._black76_greeks(contract, *values)
+                    for contract, *values in zip(contracts, *columns)
+                ]
+        return [
+            self._simplified_greeks(spot_price, contract)
+            for spot_price, contract in zip(spot_prices, contracts)
+        ]
     
     def generate_event(self) -> Dict[str, Any]:
         """
@@ -148,21 +280,47 @@ class LiveMarketSimulator:
         Returns:
             Dictionary containing advanced market event data
         """
+        step = self._step_market()
+        greeks = self._calculate_realistic_greeks(step[5]["spot_price"], step[6])
+        return self._build_event(step, greeks)
+
+    def _step_market(self) -> MarketStep:
+        """
+        Advance the market by one event: new entity, session and volatility
+        regime, a price tick, and the option to price.  The session and
+        regime are captured so a batch can price every step's option first
+        and build the events afterwards.
+        """
         self.entity_counter += 1
         
-        entity_type = random.choice(self.entity_types)
+        pool = self._pool
+        entity_type = pool.choice(self.entity_types)
+        # Unique per event: every event is its own assessment (nothing to
+        # coalesce downstream), and the Pathway pipeline keys its in-flight
+        # features by entity_id.
         entity_id = f"{entity_type}_{self.entity_counter}"
-        symbol = random.choice(self.symbols)
+        symbol = pool.choice(self.symbols)
         
         # Update market session and volatility regime
         self.market_session = self._get_market_session()
         if random.random() < 0.05:  # 5% chance to change volatility regime
-            self.volatility_regime = random.choice(["normal", "volatile", "trending"])
+            self.volatility_regime = pool.choice(("normal", "volatile", "trending"))
         
         # Get realistic market data
         price_data = self._update_market_prices(symbol)
-        greeks = self._calculate_realistic_greeks(symbol, price_data["spot_price"])
-        
+        contract = self._draw_contract(symbol, price_data["spot_price"])
+        return (
+            entity_type, entity_id, symbol, self.market_session,
+            self.volatility_regime, price_data, contract,
+        )
+
+    def _build_event(
+        self, step: MarketStep, greeks: Dict[str, float], now: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """Assemble the event dict for one market step and its Greeks, stamped ``now`` (UTC)."""
+        entity_type, entity_id, symbol, market_session, volatility_regime, price_data, _ = step
+        pool = self._pool
+
         # Enhanced features with market microstructure
         features = {
             # Core market data
@@ -181,37 +339,40 @@ class LiveMarketSimulator:
             "time_to_expiry": greeks["time_to_expiry"],
             
             # Market microstructure
-            "market_session": self.market_session,
-            "volatility_regime": self.volatility_regime,
+            "market_session": market_session,
+            "volatility_regime": volatility_regime,
             "bid_ask_spread": round(random.uniform(0.05, 0.5), 2),
-            "volume": random.randint(100, 50000),
-            "open_interest": random.randint(1000, 100000) if entity_type in ["option_chain", "futures"] else None,
+            "volume": pool.randint(100, 50000),
+            "open_interest": pool.randint(1000, 100000) if entity_type in ["option_chain", "futures"] else None,
             
             # Transaction/Risk data
-            "velocity": random.randint(1, 200),
+            "velocity": pool.randint(1, 200),
             "amount": round(random.uniform(10, 50000), 2),
-            "anomaly_score": round(random.random() * (2.0 if self.volatility_regime == "volatile" else 1.0), 3),
+            "anomaly_score": round(random.random() * (2.0 if volatility_regime == "volatile" else 1.0), 3),
             "reputation": round(random.uniform(0.2, 1.0), 3),
-            "unusual_pattern": random.random() < (0.3 if self.volatility_regime == "volatile" else 0.1),
+            "unusual_pattern": random.random() < (0.3 if volatility_regime == "volatile" else 0.1),
             "blacklist_match": random.random() < 0.02,
             
             # Market condition indicators
-            "market_condition": self.volatility_regime,
+            "market_condition": volatility_regime,
             "volatility": greeks["implied_vol"],
             "liquidity_score": round(random.uniform(0.3, 1.0), 3),
             "correlation_score": round(random.uniform(-1.0, 1.0), 3)
         }
         
+        # One clock read stamps both the ISO timestamp and tick_time
+        if now is None:
+            now = datetime.utcnow()
         event = {
             "entity_id": entity_id,
             "entity_type": entity_type,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": now.isoformat(),
             "features": features,
             "market_metadata": {
-                "session": self.market_session,
-                "volatility_regime": self.volatility_regime,
-                "tick_time": datetime.utcnow().timestamp(),
-                "exchange": "NSE" if symbol in ["NIFTY", "BANKNIFTY"] else random.choice(["NSE", "BSE"])
+                "session": market_session,
+                "volatility_regime": volatility_regime,
+                "tick_time": now.timestamp(),
+                "exchange": "NSE" if symbol in ["NIFTY", "BANKNIFTY"] else pool.choice(("NSE", "BSE"))
             }
         }
         
@@ -228,20 +389,24 @@ class LiveMarketSimulator:
         Returns:
             List of market events
         """
+        # Step the market event by event (prices and regimes evolve
+        # sequentially), then price all the steps' options in one batch
+        steps = [self._step_market() for _ in range(count)]
+        greeks_batch = self._calculate_greeks_batch(
+            [step[5]["spot_price"] for step in steps], [step[6] for step in steps],
+        )
+
         events = []
         base_time = datetime.utcnow()
         
-        for i in range(count):
-            event = self.generate_event()
-            
+        for step, greeks in zip(steps, greeks_batch):
+            event_time = None
             if time_spread:
                 # Add realistic microsecond intervals between events
                 microsecond_offset = random.randint(0, 999999)
                 event_time = base_time.replace(microsecond=microsecond_offset)
-                event["timestamp"] = event_time.isoformat()
-                event["market_metadata"]["tick_time"] = event_time.timestamp()
             
-            events.append(event)
+            events.append(self._build_event(step, greeks, event_time))
         
         return events
     
@@ -1,32 +1,80 @@
 """
 WebSocket connection manager for real-time updates
+
+Each client gets its own bounded send queue drained by one sender task.
+Broadcasting serializes the message once and puts the same string on every
+queue — no Task per message, and a slow client only backs up its own queue
+(oldest messages are dropped when it is full).
+
+With ``WS_BINARY_FRAMES`` on, messages are serialized to UTF-8 bytes and sent
+as binary frames: the encoder's output goes to every client as-is, instead of
+being decoded to ``str`` once and re-encoded by the server for each client.
+Clients must then decode binary frames (the dashboard handles both).
+Either way the payload is JSON: records carry variable-size feature dicts
+and factor lists, so a fixed-layout binary template could patch only the
+scalar fields, which are already the cheap part of orjson's encode.
+
+Clients that connect without features (``connect(ws, features=False)``) get
+a lean variant of each frame when the producer supplies one — risk records
+without their raw feature dict, under half the bytes.  The lean variant is
+serialized only while such clients are connected.
 """
 from fastapi import WebSocket
-from typing import List, Dict, Any
-import json
+from typing import Deque, List, Dict, Any, Optional, Set, Tuple, Union
+import asyncio
 import logging
+import threading
+from collections import deque
+
+from app.core import serialization
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# A serialized message: text, or UTF-8 bytes sent as a binary frame
+Payload = Union[str, bytes]
+
 
 class WebSocketManager:
     """
     Manages WebSocket connections for real-time risk updates
     """
+
+    # Per-client backlog before the oldest queued message is dropped
+    SEND_QUEUE_SIZE = 10_000
+    # Clients served per event-loop turn when fanning out a broadcast
+    BROADCAST_CHUNK = 50
+    # Frames handed over by worker threads while the loop is busy; the
+    # oldest are dropped beyond this, as a client's own queue would
+    PENDING_LIMIT = 1_000
     
     def __init__(self):
         self.active_connections: List[WebSocket] = []
+        self._send_queues: Dict[WebSocket, asyncio.Queue] = {}
+        self._senders: Dict[WebSocket, asyncio.Task] = {}
+        # Clients that asked for frames without raw features
+        self._lean: Set[WebSocket] = set()
+        # Messages handed over by worker threads (full, lean), waiting for the loop
+        self._pending: Deque[Tuple[Payload, Optional[Payload]]] = deque(maxlen=self.PENDING_LIMIT)
+        self._pending_lock = threading.Lock()
+        self._drain_scheduled = False
         logger.info("WebSocket manager initialized")
     
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, features: bool = True):
         """
         Accept and register a new WebSocket connection
         
         Args:
             websocket: FastAPI WebSocket instance
+            features: False to receive the lean variant of broadcasts
         """
         await websocket.accept()
         self.active_connections.append(websocket)
+        if not features:
+            self._lean.add(websocket)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.SEND_QUEUE_SIZE)
+        self._send_queues[websocket] = queue
+        self._senders[websocket] = asyncio.create_task(self._sender(websocket, queue))
         logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
     
     def disconnect(self, websocket: WebSocket):
@@ -36,9 +84,160 @@ class WebSocketManager:
         Args:
             websocket: WebSocket to remove
         """
+        self._send_queues.pop(websocket, None)
+        self._lean.discard(websocket)
+        sender = self._senders.pop(websocket, None)
+        if sender is not None and sender is not asyncio.current_task():
+            sender.cancel()
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
             logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
+
+    async def _sender(self, websocket: WebSocket, queue: asyncio.Queue):
+        """
+        Drain one client's send queue for the life of the connection
+        
+        Args:
+            websocket: Client to send to
+            queue: That client's queue of serialized messages
+        """
+        try:
+            while True:
+                message_json = await queue.get()
+                if type(message_json) is bytes:
+                    await websocket.send_bytes(message_json)
+                else:
+                    await websocket.send_text(message_json)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error sending to WebSocket: {e}")
+            self.disconnect(websocket)
+
+    @staticmethod
+    def serialize(message: Dict[str, Any]) -> Payload:
+        """
+        Encode a message for ``publish``: bytes when WS_BINARY_FRAMES is on
+        
+        Safe to call from worker threads, so producers can serialize off the
+        event loop.
+        """
+        if settings.WS_BINARY_FRAMES:
+            return serialization.dumps_bytes(message)
+        return serialization.dumps(message)
+    
+    def has_lean_clients(self) -> bool:
+        """True while any client takes the lean variant of broadcasts"""
+        return bool(self._lean)
+
+    def _queue_groups(self) -> Tuple[List[asyncio.Queue], List[asyncio.Queue]]:
+        """Snapshot the (full, lean) client queues"""
+        if not self._lean:
+            return list(self._send_queues.values()), []
+        full, lean = [], []
+        for websocket, queue in self._send_queues.items():
+            (lean if websocket in self._lean else full).append(queue)
+        return full, lean
+
+    def publish(self, message_json: Payload, lean_json: Optional[Payload] = None):
+        """
+        Queue an already-serialized message for every connected client
+        
+        Must run on the event loop thread; worker threads go through
+        ``publish_threadsafe``.  Clients are served BROADCAST_CHUNK
+        at a time: the first chunk synchronously, each further chunk as a
+        ``loop.call_soon`` callback, so HTTP handlers get a turn between
+        chunks without a Task or coroutine being created per message.
+        
+        Args:
+            message_json: Serialized message (see ``serialize``) sent as-is
+                to each client
+            lean_json: Variant for clients connected without features;
+                they get ``message_json`` when omitted
+        """
+        self._publish_groups(self._queue_groups(), message_json, lean_json)
+
+    def _publish_groups(
+        self,
+        groups: Tuple[List[asyncio.Queue], List[asyncio.Queue]],
+        message_json: Payload,
+        lean_json: Optional[Payload],
+    ):
+        full, lean = groups
+        if full:
+            self._publish_from(full, message_json, 0)
+        if lean:
+            self._publish_from(lean, message_json if lean_json is None else lean_json, 0)
+
+    def publish_threadsafe(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        message_json: Payload,
+        lean_json: Optional[Payload] = None,
+    ):
+        """
+        Queue a serialized message for every client from a worker thread
+        
+        Messages accumulate in a pending deque (at most PENDING_LIMIT, oldest
+        dropped first); only the first one since the last drain schedules a
+        ``loop.call_soon_threadsafe`` callback, so when the loop is busy
+        several hand-overs cost a single wake-up.  Order is preserved.
+        Called on the loop's own thread, it publishes directly once earlier
+        hand-overs have drained — no self-pipe wake-up needed.
+        
+        Args:
+            loop: The event loop the manager's clients are served on
+            message_json: Serialized message (see ``serialize``) sent as-is
+                to each client
+            lean_json: Variant for clients connected without features
+        """
+        try:
+            on_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:   # a worker thread — no loop running here
+            on_loop = False
+        if on_loop:
+            with self._pending_lock:
+                direct = not self._drain_scheduled
+            if direct:
+                self.publish(message_json, lean_json)
+                return
+        with self._pending_lock:
+            self._pending.append((message_json, lean_json))
+            if self._drain_scheduled:
+                return
+            self._drain_scheduled = True
+        try:
+            loop.call_soon_threadsafe(self._drain_pending)
+        except RuntimeError:
+            # Loop closed (shutdown) — nothing will drain, so drop the backlog
+            with self._pending_lock:
+                self._pending.clear()
+                self._drain_scheduled = False
+
+    def _drain_pending(self):
+        """Publish everything worker threads queued since the last drain"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, deque(maxlen=self.PENDING_LIMIT)
+            self._drain_scheduled = False
+        if not self._send_queues:
+            return
+        groups = self._queue_groups()   # one snapshot for the drain
+        for message_json, lean_json in pending:
+            self._publish_groups(groups, message_json, lean_json)
+
+    def _publish_from(self, queues: List[asyncio.Queue], message_json: Payload, start: int):
+        """Enqueue one chunk starting at ``start`` and schedule the next"""
+        end = start + self.BROADCAST_CHUNK
+        self._enqueue(queues[start:end], message_json)
+        if end < len(queues):
+            asyncio.get_running_loop().call_soon(self._publish_from, queues, message_json, end)
+
+    @staticmethod
+    def _enqueue(queues: List[asyncio.Queue], message_json: Payload):
+        for queue in queues:
+            if queue.full():
+                queue.get_nowait()   # drop oldest — client is falling behind
+            queue.put_nowait(message_json)
     
     async def send_personal_message(self, message: str, websocket: WebSocket):
         """
@@ -54,22 +253,15 @@ class WebSocketManager:
         """
         Broadcast a message to all connected WebSockets
         
+        The message is serialized once and queued for each client's sender;
+        with no client connected it is not serialized at all.
+        
         Args:
             message: Message dictionary to broadcast
         """
-        message_json = json.dumps(message)
-        
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message_json)
-            except Exception as e:
-                logger.error(f"Error sending to WebSocket: {e}")
-                disconnected.append(connection)
-        
-        # Remove disconnected connections
-        for connection in disconnected:
-            self.disconnect(connection)
+        if not self._send_queues:
+            return
+        self.publish(self.serialize(message))
     
     async def broadcast_risk_update(self, risk_data: Dict[str, Any]):
         """
@@ -83,7 +275,7 @@ class WebSocketManager:
             "data": risk_data
         }
         await self.broadcast(message)
-        logger.debug(f"Risk update broadcasted to {len(self.active_connections)} connections")
+        logger.debug("Risk update broadcasted to %d connections", len(self.active_connections))
     
     async def broadcast_alert(self, alert_data: Dict[str, Any]):
         """
@@ -100,7 +292,12 @@ class WebSocketManager:
         logger.info(f"Alert broadcasted to {len(self.active_connections)} connections")
     
     def get_connection_count(self) -> int:
-        """Get number of active connections"""
+        """
+        Get number of active connections
+        
+        Cheap enough for producers to check on every flush, from any thread,
+        and skip building a message nobody would receive.
+        """
         return len(self.active_connections)
 
 
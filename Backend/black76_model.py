@@ -3,13 +3,117 @@ Black-76 Model Implementation for Options Pricing and Greeks Calculation
 Used for pricing futures options commonly in commodity and index markets
 """
 
+import math
 import numpy as np
 from scipy.stats import norm
-from typing import Dict, Literal
+from typing import Dict, Literal, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# ── Optional Numba acceleration for the all-Greeks kernel ────────────────────
+try:
+    from numba import njit
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+
+_SQRT2 = math.sqrt(2.0)
+_INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
+
+
+def _black76_all(
+    spot_price: float,
+    strike_price: float,
+    time_to_expiry: float,
+    volatility: float,
+    risk_free_rate: float,
+    is_call: bool,
+) -> Tuple[float, float, float, float, float, float]:
+    """
+    Price and all Greeks in one pass: (price, delta, gamma, vega, theta, rho).
+
+    Same formulas and scaling as the per-Greek methods, but d1/d2, the
+    discount factor and N(·)/n(·) are each evaluated once, with N(x) from
+    ``math.erfc`` instead of scalar ``scipy.stats.norm`` calls.  Compiled with
+    Numba (eagerly, at import) when it is installed.
+    """
+    sqrt_t = math.sqrt(time_to_expiry)
+    vol_sqrt_t = volatility * sqrt_t
+    d1 = (math.log(spot_price / strike_price)
+          + (volatility ** 2 / 2) * time_to_expiry) / vol_sqrt_t
+    d2 = d1 - vol_sqrt_t
+    discount = math.exp(-risk_free_rate * time_to_expiry)
+    pdf_d1 = _INV_SQRT_2PI * math.exp(-0.5 * d1 * d1)
+
+    gamma = (discount * pdf_d1) / (spot_price * vol_sqrt_t)
+    vega = discount * spot_price * pdf_d1 * sqrt_t / 100
+    theta_decay = -(discount * spot_price * pdf_d1 * volatility) / (2 * sqrt_t)
+
+    if is_call:
+        n_d1 = 0.5 * math.erfc(-d1 / _SQRT2)
+        n_d2 = 0.5 * math.erfc(-d2 / _SQRT2)
+        price = discount * (spot_price * n_d1 - strike_price * n_d2)
+        delta = discount * n_d1
+        theta = (theta_decay - risk_free_rate * discount * strike_price * n_d2) / 365
+        rho = time_to_expiry * discount * strike_price * n_d2 / 100
+    else:
+        n_md1 = 0.5 * math.erfc(d1 / _SQRT2)
+        n_md2 = 0.5 * math.erfc(d2 / _SQRT2)
+        price = discount * (strike_price * n_md2 - spot_price * n_md1)
+        delta = -discount * n_md1
+        theta = (theta_decay + risk_free_rate * discount * strike_price * n_md2) / 365
+        rho = -time_to_expiry * discount * strike_price * n_md2 / 100
+
+    return price, delta, gamma, vega, theta, rho
+
+
+if _NUMBA_AVAILABLE:
+    # Explicit signature → compiled at import, not on the first simulator tick
+    _black76_all = njit(
+        "UniTuple(float64, 6)(float64, float64, float64, float64, float64, boolean)",
+        cache=True,
+    )(_black76_all)
+
+
+def _black76_batch(
+    spot_price: np.ndarray,
+    strike_price: np.ndarray,
+    time_to_expiry: np.ndarray,
+    volatility: np.ndarray,
+    risk_free_rate: float,
+    is_call: np.ndarray,
+) -> np.ndarray:
+    """
+    ``_black76_all`` over arrays of contracts, in one call.
+
+    Returns a (6, n) block whose rows are price, delta, gamma, vega, theta
+    and rho; column ``i`` is exactly the scalar kernel's result for contract
+    ``i``.  Compiled with Numba (eagerly, at import) when it is installed, so
+    a batch of contracts crosses from Python into machine code once.
+    """
+    n = spot_price.shape[0]
+    out = np.empty((6, n))
+    for i in range(n):
+        price, delta, gamma, vega, theta, rho = _black76_all(
+            spot_price[i], strike_price[i], time_to_expiry[i],
+            volatility[i], risk_free_rate, is_call[i],
+        )
+        out[0, i] = price
+        out[1, i] = delta
+        out[2, i] = gamma
+        out[3, i] = vega
+        out[4, i] = theta
+        out[5, i] = rho
+    return out
+
+
+if _NUMBA_AVAILABLE:
+    _black76_batch = njit(
+        "float64[:, :](float64[:], float64[:], float64[:], float64[:], float64, boolean[:])",
+        cache=True,
+    )(_black76_batch)
+
 class Black76Calculator:
     """
     Black-76 model for pricing options and calculating Greeks
@@ -245,38 +349,24 @@ class Black76Calculator:
         """
         Calculate option price and all Greeks at once
         
+        Evaluated by the single-pass ``_black76_all`` kernel; results match
+        the individual ``calculate_*`` methods.
+        
         Returns:
             Dictionary containing price and all Greeks
         """
+        if time_to_expiry <= 0:
+            raise ValueError("Time to expiry must be positive")
+        if volatility <= 0:
+            raise ValueError("Volatility must be positive")
+        option = option_type.lower()
+        if option not in ("call", "put"):
+            raise ValueError(f"Invalid option_type: {option_type}. Must be 'call' or 'put'")
+        
         try:
-            price = self.calculate_option_price(
-                spot_price, strike_price, time_to_expiry,
-                volatility, risk_free_rate, option_type
-            )
-            
-            delta = self.calculate_delta(
-                spot_price, strike_price, time_to_expiry,
-                volatility, risk_free_rate, option_type
-            )
-            
-            gamma = self.calculate_gamma(
-                spot_price, strike_price, time_to_expiry,
-                volatility, risk_free_rate
-            )
-            
-            vega = self.calculate_vega(
-                spot_price, strike_price, time_to_expiry,
-                volatility, risk_free_rate
-            )
-            
-            theta = self.calculate_theta(
-                spot_price, strike_price, time_to_expiry,
-                volatility, risk_free_rate, option_type
-            )
-            
-            rho = self.calculate_rho(
-                spot_price, strike_price, time_to_expiry,
-                volatility, risk_free_rate, option_type
+            price, delta, gamma, vega, theta, rho = _black76_all(
+                float(spot_price), float(strike_price), float(time_to_expiry),
+                float(volatility), float(risk_free_rate), option == "call"
             )
             
             return {
@@ -292,6 +382,48 @@ class Black76Calculator:
             logger.error(f"Error calculating Greeks: {e}")
             raise
 
+    def calculate_all_greeks_batch(
+        self,
+        spot_prices: np.ndarray,
+        strike_prices: np.ndarray,
+        times_to_expiry: np.ndarray,
+        volatilities: np.ndarray,
+        risk_free_rate: float,
+        is_call: np.ndarray,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Price and all Greeks for a batch of contracts at once
+        
+        Same keys as ``calculate_all_greeks``, each holding one float64
+        array with a value per contract.  ``is_call`` is a boolean array
+        (True for calls, False for puts).
+        
+        Returns:
+            Dictionary of arrays containing price and all Greeks
+        """
+        spot_prices = np.ascontiguousarray(spot_prices, dtype=np.float64)
+        strike_prices = np.ascontiguousarray(strike_prices, dtype=np.float64)
+        times_to_expiry = np.ascontiguousarray(times_to_expiry, dtype=np.float64)
+        volatilities = np.ascontiguousarray(volatilities, dtype=np.float64)
+        is_call = np.ascontiguousarray(is_call, dtype=np.bool_)
+        if times_to_expiry.size and times_to_expiry.min() <= 0:
+            raise ValueError("Time to expiry must be positive")
+        if volatilities.size and volatilities.min() <= 0:
+            raise ValueError("Volatility must be positive")
+        
+        price, delta, gamma, vega, theta, rho = _black76_batch(
+            spot_prices, strike_prices, times_to_expiry,
+            volatilities, float(risk_free_rate), is_call
+        )
+        return {
+            "price": price,
+            "delta": delta,
+            "gamma": gamma,
+            "vega": vega,
+            "theta": theta,
+            "rho": rho
+        }
+
 # Example usage and testing
 if __name__ == "__main__":
     calculator = Black76Calculator()
@@ -8,13 +8,32 @@ SessionLocal → we must pass ``check_same_thread=False`` when SQLite is the
 backend, otherwise SQLAlchemy raises "SQLite objects created in a thread can
 only be used in that same thread."
 
-PostgreSQL / other engines: ``pool_pre_ping=True`` checks each connection
-before handing it to the caller, silently reconnecting on stale sockets.
+File databases get a regular connection pool, so the risk writer shards
+and request handlers each work on their own connection; WAL mode lets
+readers proceed during a write and ``timeout`` makes a writer wait for
+the lock instead of failing.  ``SQLITE_SYNCHRONOUS_NORMAL`` opts into
+synchronous=NORMAL, so commits skip the per-transaction fsync.  Only
+in-memory databases, which exist per connection, share a single StaticPool
+connection.
+
+PostgreSQL / other engines: ``pool_pre_ping`` (on by default) checks each
+connection before handing it to the caller, silently reconnecting on stale
+sockets.  Pool size, overflow, pre-ping and recycle come from the DB_POOL_*
+settings.
+
+The streaming risk writer opens one session for its whole lifetime rather
+than one per event, bound to a connection it keeps checked out (one per
+writer shard), and only issues Core statements through it, so its
+identity map never grows.
+
+JSON columns (risk features, factors, alert details, audit details) are
+encoded/decoded with app.core.serialization, i.e. orjson when installed.
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from typing import Generator
 
+from app.core import serialization
 from app.core.config import settings
 
 
@@ -22,20 +41,46 @@ def _build_engine():
     url: str = settings.DATABASE_URL
     if url.startswith("sqlite"):
         # SQLite requires check_same_thread=False for multi-threaded access.
-        # NullPool avoids connection re-use across threads entirely (safer for SQLite).
-        from sqlalchemy.pool import StaticPool
-        return create_engine(
+        if ":memory:" in url or url.rstrip("/") in ("sqlite:", "sqlite+pysqlite:"):
+            # In-memory: every connection is a separate database, so share one
+            from sqlalchemy.pool import StaticPool
+            return create_engine(
+                url,
+                connect_args={"check_same_thread": False},
+                poolclass=StaticPool,
+                json_serializer=serialization.dumps,
+                json_deserializer=serialization.loads,
+                echo=settings.DEBUG,
+            )
+        sqlite_engine = create_engine(
             url,
-            connect_args={"check_same_thread": False},
-            poolclass=StaticPool,       # single shared connection — fine for SQLite dev
+            connect_args={"check_same_thread": False, "timeout": 30},
+            json_serializer=serialization.dumps,
+            json_deserializer=serialization.loads,
             echo=settings.DEBUG,
         )
+
+        @event.listens_for(sqlite_engine, "connect")
+        def _sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            if settings.SQLITE_SYNCHRONOUS_NORMAL:
+                # In WAL mode NORMAL syncs at checkpoints rather than on every
+                # commit: still corruption-safe, at worst the last transactions
+                # are lost on power failure (not on a process crash).
+                cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+        return sqlite_engine
     # PostgreSQL / MySQL / etc.
     return create_engine(
         url,
-        pool_pre_ping=True,
-        pool_size=10,
-        max_overflow=20,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE_S,
+        json_serializer=serialization.dumps,
+        json_deserializer=serialization.loads,
         echo=settings.DEBUG,
     )
 
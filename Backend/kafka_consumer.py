@@ -4,11 +4,11 @@ Kafka Consumer for Receiving Processed Data
 
 from kafka import KafkaConsumer
 from kafka.errors import KafkaError
-import json
 import logging
 from typing import Callable, Dict, Any
 from datetime import datetime
 
+from app.core import serialization
 from config import settings
 
 logger = logging.getLogger(__name__)
@@ -31,7 +31,8 @@ class MarketDataConsumer:
                 *topics,
                 bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
                 group_id=group_id or settings.KAFKA_CONSUMER_GROUP,
-                value_deserializer=lambda m: json.loads(m.decode('utf-8')),
+                # orjson parses the UTF-8 bytes directly (stdlib json fallback)
+                value_deserializer=serialization.loads,
                 key_deserializer=lambda k: k.decode('utf-8') if k else None,
                 auto_offset_reset='latest',
                 enable_auto_commit=True,
@@ -10,11 +10,11 @@ except ImportError:
     KAFKA_AVAILABLE = False
     KafkaError = Exception
 
-import json
 import logging
 from typing import Dict, Any
 from datetime import datetime
 
+from app.core import serialization
 from config import settings
 
 logger = logging.getLogger(__name__)
@@ -32,7 +32,8 @@ class MarketDataProducer:
         try:
             self.producer = KafkaProducer(
                 bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
-                value_serializer=lambda v: json.dumps(v).encode('utf-8'),
+                # Compact UTF-8 JSON bytes straight from orjson (stdlib fallback)
+                value_serializer=serialization.dumps_bytes,
                 key_serializer=lambda k: k.encode('utf-8') if k else None,
                 acks='all',  # Wait for all replicas
                 retries=3,
@@ -221,6 +221,419 @@ class TestHealthCheck:
         assert "streaming" in data
 
 
+class TestConfigCache:
+    """Test the versioned configuration cache"""
+
+    def test_update_invalidates_cached_config(self):
+        """Reads are served from the cache until the configuration changes"""
+        from app.config.cache import ConfigCache
+        cache = ConfigCache()
+        stored = {"high_threshold": 0.7}
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return dict(stored)
+
+        assert cache.get("current", loader) == {"high_threshold": 0.7}
+        assert cache.get("current", loader) == {"high_threshold": 0.7}
+        assert len(loads) == 1
+
+        stored["high_threshold"] = 0.85
+        cache.invalidate()
+        assert cache.get("current", loader) == {"high_threshold": 0.85}
+        assert len(loads) == 2
+
+    def test_load_racing_an_update_is_not_cached(self):
+        """A value loaded before an invalidation is returned but not stored"""
+        from app.config.cache import ConfigCache
+        cache = ConfigCache()
+        stored = {"high_threshold": 0.7}
+
+        def racing_loader():
+            value = dict(stored)
+            stored["high_threshold"] = 0.85   # an update lands mid-load
+            cache.invalidate()
+            return value
+
+        assert cache.get("current", racing_loader) == {"high_threshold": 0.7}
+        assert cache.get("current", lambda: dict(stored)) == {"high_threshold": 0.85}
+
+
+class TestRateLimitFilter:
+    """Test token-bucket suppression of high-rate log records"""
+
+    def test_suppresses_bursts_and_reports_count(self, monkeypatch):
+        """Beyond ``rate`` records per second, records are dropped and counted"""
+        import logging
+        from app.core import log_filters
+        clock = [100.0]
+        monkeypatch.setattr(log_filters.time, "monotonic", lambda: clock[0])
+        limiter = log_filters.RateLimitFilter(rate=2)
+
+        def record(level=logging.ERROR):
+            return logging.LogRecord("test", level, __file__, 1, "event failed", (), None)
+
+        passed = [limiter.filter(record()) for _ in range(5)]
+        assert passed == [True, True, False, False, False]
+        assert limiter.filter(record(logging.INFO))   # below level: never limited
+
+        clock[0] += 1.0   # refills the bucket
+        released = record()
+        assert limiter.filter(released)
+        assert released.getMessage() == "event failed [3 similar records suppressed]"
+
+
+class TestWebSocketManager:
+    """Test cross-thread hand-over of broadcasts to WebSocket clients"""
+
+    class _Socket:
+        def __init__(self):
+            self.sent = []
+
+        async def accept(self):
+            pass
+
+        async def send_text(self, message):
+            self.sent.append(message)
+
+        async def send_bytes(self, message):
+            self.sent.append(message)
+
+    def test_coalesced_handovers_keep_order_and_routing(self):
+        """Hand-overs queued while the loop is busy drain once, in order, to the right clients"""
+        import asyncio
+        import threading
+        from app.websocket.manager import WebSocketManager
+
+        manager = WebSocketManager()
+        full, lean = self._Socket(), self._Socket()
+        drains = []
+        drain_pending = manager._drain_pending
+
+        def counting_drain():
+            drains.append(1)
+            drain_pending()
+
+        manager._drain_pending = counting_drain
+        messages = [(f"full-{i}", f"lean-{i}" if i % 3 else None) for i in range(30)]
+
+        def produce():
+            for message_json, lean_json in messages:
+                manager.publish_threadsafe(loop, message_json, lean_json)
+
+        async def scenario():
+            await manager.connect(full)
+            await manager.connect(lean, features=False)
+            # The worker publishes while the loop is blocked joining it, so
+            # every hand-over lands in the pending deque before a drain runs
+            producer = threading.Thread(target=produce)
+            producer.start()
+            producer.join()
+            for _ in range(200):
+                if len(full.sent) == len(lean.sent) == len(messages):
+                    break
+                await asyncio.sleep(0.01)
+            manager.disconnect(full)
+            manager.disconnect(lean)
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(scenario())
+        finally:
+            loop.close()
+
+        assert len(drains) == 1
+        assert full.sent == [m for m, _ in messages]
+        assert lean.sent == [m if l is None else l for m, l in messages]
+
+
+class TestRiskEngine:
+    """Test that the batch kernels agree with the per-event reference"""
+
+    def _events(self):
+        """Simulator events plus hand-made edge cases"""
+        from app.streaming.simulator import LiveMarketSimulator
+        simulator = LiveMarketSimulator()
+        events = [simulator.generate_event()["features"] for _ in range(500)]
+        events += [
+            {"velocity": 10, "amount": 100, "anomaly_score": 0.1, "reputation": 0.9},
+            {"velocity": 80, "amount": 20_000, "anomaly_score": 0.9, "reputation": 0.1},
+            {"velocity": 5, "blacklist_match": True},
+            {"velocity": 5, "unusual_pattern": True, "delta": -0.9},
+            {"implied_vol": 0.6, "gamma": 0.04, "liquidity_score": 0.2,
+             "market_session": "pre_open", "price_change_pct": -3.5},
+            {"spot_price": 100.0, "bid_ask_spread": 0.8, "market_session": "holiday"},
+        ]
+        return events
+
+    def test_batch_matches_single_event(self):
+        """assess_batch matches score → level → factors, event for event"""
+        from app.risk.engine import risk_engine
+
+        events = self._events()
+        expected = []
+        for features in events:
+            score = risk_engine.calculate_risk_score(features)
+            expected.append((
+                score,
+                risk_engine.classify_risk_level(score),
+                risk_engine.identify_risk_factors(features, score),
+            ))
+
+        assert risk_engine.assess_batch(events) == expected
+        assert risk_engine.assess_risk("e1", "trader", events[0]) == expected[0]
+
+    def test_numpy_kernel_matches_compiled_kernel(self):
+        """The NumPy fallback kernel and the weight-specialised kernel agree"""
+        import numpy as np
+        from app.risk import engine_numba
+        from app.risk.engine import risk_engine
+
+        events = self._events()
+        block = np.empty((engine_numba.N_FEATURES, len(events)))
+        engine_numba.pack_batch(
+            [
+                engine_numba.feature_row(
+                    f, risk_engine.has_market_features(f),
+                    risk_engine._SESSION_RISK, risk_engine._SESSION_RISK_DEFAULT,
+                )
+                for f in events
+            ],
+            block,
+        )
+
+        scores, masks = risk_engine._batch_scorer(block)
+        np_scores, np_masks = engine_numba._score_batch_numpy(block, risk_engine.batch_weights())
+
+        assert scores.tolist() == np_scores.tolist()
+        assert masks.tolist() == np_masks.tolist()
+
+
+class TestRiskBatchWriter:
+    """Test batching, backpressure and persistence of the streaming risk writer"""
+
+    def setup_method(self):
+        Base.metadata.create_all(bind=engine)
+
+    def teardown_method(self):
+        Base.metadata.drop_all(bind=engine)
+
+    def _row(self, entity_id, risk_level="low", risk_score=0.1):
+        return {
+            "entity_id": entity_id,
+            "entity_type": "trader",
+            "risk_score": risk_score,
+            "risk_level": risk_level,
+            "features": {"velocity": 10},
+            "risk_factors": ["test factor"],
+            "source": "test",
+        }
+
+    def _writer(self, monkeypatch, **kwargs):
+        """A RiskBatchWriter on the test database; returns (writer, flushed batches, flush event)"""
+        import threading
+        from app.streaming import risk_writer
+        monkeypatch.setattr(risk_writer, "engine", engine)
+        monkeypatch.setattr(risk_writer, "SessionLocal", TestingSessionLocal)
+        flushed = []
+        done = threading.Event()
+
+        def on_flushed(rows):
+            flushed.append(list(rows))
+            done.set()
+
+        kwargs.setdefault("alert_dedupe_s", 0)
+        writer = risk_writer.RiskBatchWriter(on_flushed, **kwargs)
+        return writer, flushed, done
+
+    def test_flushes_when_batch_is_full(self, monkeypatch):
+        """A full batch is flushed without waiting for the deadline"""
+        writer, flushed, done = self._writer(monkeypatch, batch_size=4, flush_interval=30.0)
+        writer.start()
+        try:
+            for i in range(4):
+                writer.submit(self._row(f"E{i}"))
+            assert done.wait(5)
+        finally:
+            writer.stop()
+        assert [row["entity_id"] for row in flushed[0]] == ["E0", "E1", "E2", "E3"]
+        assert all(row["id"] and row["created_at"] for row in flushed[0])
+
+    def test_flushes_at_deadline(self, monkeypatch):
+        """A partial batch is flushed once its first row has waited flush_interval"""
+        import time
+        writer, flushed, done = self._writer(monkeypatch, batch_size=100, flush_interval=0.2)
+        writer.start()
+        try:
+            started = time.monotonic()
+            writer.submit(self._row("E1"))
+            assert done.wait(5)
+            waited = time.monotonic() - started
+        finally:
+            writer.stop()
+        assert waited >= 0.15
+        assert len(flushed[0]) == 1
+
+    def test_alerting_row_flushes_at_once(self, monkeypatch):
+        """A high-risk row skips the deadline and gets its alert in the same batch"""
+        from app.alerts.models import Alert
+        writer, flushed, done = self._writer(monkeypatch, batch_size=100, flush_interval=30.0)
+        writer.start()
+        try:
+            writer.submit(self._row("E1"))
+            writer.submit(self._row("E2", risk_level="high", risk_score=0.8))
+            assert done.wait(5)
+        finally:
+            writer.stop()
+        assert [row["entity_id"] for row in flushed[0]] == ["E1", "E2"]
+        db = TestingSessionLocal()
+        try:
+            alerts = db.query(Alert).all()
+            assert [alert.risk_id for alert in alerts] == [flushed[0][1]["id"]]
+        finally:
+            db.close()
+
+    def test_prepared_alerting_row_flushes_at_once(self, monkeypatch):
+        """A row that prepare scores at an alerting level flushes the open batch"""
+        def prepare(rows):
+            for row in rows:
+                high = row["entity_id"] == "E2"
+                row["risk_score"] = 0.8 if high else 0.1
+                row["risk_level"] = "high" if high else "low"
+
+        writer, flushed, done = self._writer(
+            monkeypatch, batch_size=100, flush_interval=30.0, prepare=prepare
+        )
+        writer.start()
+        try:
+            for entity_id in ("E1", "E2"):
+                row = self._row(entity_id)
+                del row["risk_score"], row["risk_level"]
+                writer.submit(row)
+            assert done.wait(5)
+        finally:
+            writer.stop()
+        assert [row["risk_level"] for row in flushed[0]] == ["low", "high"]
+
+    def test_submit_blocks_when_buffer_is_full(self, monkeypatch):
+        """Beyond MAX_PENDING rows, submit() waits for the flusher"""
+        import threading
+        writer, flushed, done = self._writer(monkeypatch, batch_size=100, flush_interval=0.05)
+        writer.MAX_PENDING = 3
+        for i in range(3):
+            writer.submit(self._row(f"E{i}"))
+
+        producer = threading.Thread(target=writer.submit, args=(self._row("E3"),))
+        producer.start()
+        producer.join(0.3)
+        assert producer.is_alive()   # blocked: the flusher is not running yet
+
+        writer.start()
+        try:
+            producer.join(5)
+            assert not producer.is_alive()
+        finally:
+            writer.stop()
+        assert [row["entity_id"] for batch in flushed for row in batch] == ["E0", "E1", "E2", "E3"]
+
+    def test_returned_ids_follow_row_order(self):
+        """RETURNING ids are matched to the rows and assessments they belong to"""
+        from app.alerts.models import Alert
+        from app.alerts.service import AlertService
+        from app.risk.models import Risk
+        from app.streaming.risk_writer import _insert_risks
+
+        rows = [self._row(f"E{i}", risk_level="high", risk_score=0.8) for i in range(50)]
+        db = TestingSessionLocal()
+        try:
+            _insert_risks(db, rows)
+            assessments = rows[::-3]   # out of id order
+            alert_ids = AlertService.create_alerts_for_assessments(db, assessments)
+            db.commit()
+
+            for row in rows:
+                assert db.get(Risk, row["id"]).entity_id == row["entity_id"]
+            assert len(alert_ids) == len(assessments)
+            for alert_id, assessment in zip(alert_ids, assessments):
+                assert db.get(Alert, alert_id).risk_id == assessment["id"]
+        finally:
+            db.close()
+
+
+class TestStreamingScoring:
+    """Test batch scoring on the fallback pipeline's writer shards"""
+    
+    def _fallback_pipeline(self, monkeypatch):
+        """Load the threading-fallback PathwayPipeline, with Pathway hidden"""
+        import importlib.util
+        import sys
+        monkeypatch.setitem(sys.modules, "pathway", None)
+        spec = importlib.util.spec_from_file_location(
+            "_fallback_pathway_pipeline", "app/streaming/pathway_pipeline.py"
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        assert not module.PATHWAY_AVAILABLE
+        return module.PathwayPipeline()
+    
+    def test_sharded_scoring_matches_single_thread(self, monkeypatch):
+        """Concurrent shard threads score exactly like one thread does"""
+        import threading
+        from app.core.config import settings
+        from app.risk.engine import risk_engine
+        from app.streaming.simulator import LiveMarketSimulator
+        
+        pipeline = self._fallback_pipeline(monkeypatch)
+        simulator = LiveMarketSimulator()
+        shards, batches_per_shard = 4, 50
+        batches = [
+            [simulator.generate_event()["features"] for _ in range(settings.STREAM_BATCH_SIZE)]
+            for _ in range(shards * batches_per_shard)
+        ]
+        expected = [
+            [(score, level) for score, level, _ in risk_engine.assess_batch(features)]
+            for features in batches
+        ]
+        
+        results = [None] * len(batches)
+        start = threading.Barrier(shards)
+        
+        def shard(index):
+            start.wait()
+            for i in range(index, len(batches), shards):
+                rows = [{"features": features} for features in batches[i]]
+                pipeline._score_batch(rows)
+                results[i] = [(row["risk_score"], row["risk_level"]) for row in rows]
+        
+        threads = [threading.Thread(target=shard, args=(i,)) for i in range(shards)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert results == expected
+
+    def test_non_numeric_features_are_rejected(self, monkeypatch):
+        """Events with a missing scoring value are rejected, not scored critical"""
+        from app.risk.engine import risk_engine
+        from app.streaming.simulator import LiveMarketSimulator
+
+        pipeline = self._fallback_pipeline(monkeypatch)
+        simulator = LiveMarketSimulator()
+        good = simulator.generate_event()["features"]
+        bad = dict(good, velocity=None)
+
+        results = risk_engine.assess_batch([good, bad])
+        assert results[0] is not None
+        assert results[1] is None
+
+        rows = [{"features": good}, {"features": bad}]
+        rejected = pipeline._score_batch(rows)
+        assert rejected == [rows[1]]
+        assert "risk_level" not in rows[1]
+
+
 # Run tests with: pytest test_comprehensive.py -v
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -75,9 +75,10 @@ function AppContent() {
           setConnectionError(error?.message || "Connection error");
         });
         
-        api.on("risk-update", (data: RiskData) => {
-          setLatestRisk(data);
-          setRiskData((prev) => [data, ...prev].slice(0, 50)); // Keep last 50 risks
+        api.on("risk-batch", (batch: RiskData[]) => {
+          setLatestRisk(batch[batch.length - 1]);
+          // Newest first; keep last 50 risks
+          setRiskData((prev) => [...batch.slice(-50).reverse(), ...prev].slice(0, 50));
         });
 
         await api.connectWebSocket();
@@ -20,17 +20,23 @@ export function LiveStreamEvents({ isDarkMode }: LiveStreamEventsProps) {
 
   useEffect(() => {
     // Listen to real-time risk updates from backend
+    const toStreamEvent = (riskData: RiskData): StreamEvent => ({
+      id: `${riskData.id}-${Date.now()}`,
+      type: "update",
+      message: `Risk assessed for ${riskData.entity_type}:${riskData.entity_id} - Score: ${riskData.risk_score.toFixed(3)}, Level: ${riskData.risk_level}`,
+      timestamp: new Date(),
+      risk_score: riskData.risk_score,
+      entity_id: riskData.entity_id,
+    });
+
     const handleRiskUpdate = (riskData: RiskData) => {
-      const newEvent: StreamEvent = {
-        id: `${riskData.id}-${Date.now()}`,
-        type: "update",
-        message: `Risk assessed for ${riskData.entity_type}:${riskData.entity_id} - Score: ${riskData.risk_score.toFixed(3)}, Level: ${riskData.risk_level}`,
-        timestamp: new Date(),
-        risk_score: riskData.risk_score,
-        entity_id: riskData.entity_id,
-      };
-      
-      setEvents(prev => [newEvent, ...prev].slice(0, 10)); // Keep last 10 events
+      setEvents(prev => [toStreamEvent(riskData), ...prev].slice(0, 10)); // Keep last 10 events
+    };
+
+    // One state update per WebSocket frame; only the newest 10 rows matter
+    const handleRiskBatch = (batch: RiskData[]) => {
+      const newEvents = batch.slice(-10).reverse().map(toStreamEvent);
+      setEvents(prev => [...newEvents, ...prev].slice(0, 10));
     };
 
     // Add Greeks computation as a simulated event
@@ -54,7 +60,7 @@ export function LiveStreamEvents({ isDarkMode }: LiveStreamEventsProps) {
     };
 
     // Subscribe to WebSocket updates
-    api.on("risk-update", handleRiskUpdate);
+    api.on("risk-batch", handleRiskBatch);
 
     // Simulate Greek computation events periodically
     const computeInterval = setInterval(computeEvent, 5000);
@@ -70,7 +76,7 @@ export function LiveStreamEvents({ isDarkMode }: LiveStreamEventsProps) {
     fetchInitialEvents();
 
     return () => {
-      api.off("risk-update", handleRiskUpdate);
+      api.off("risk-batch", handleRiskBatch);
       clearInterval(computeInterval);
     };
   }, []);
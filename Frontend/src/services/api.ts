@@ -5,6 +5,7 @@
 
 const API_BASE_URL = "http://localhost:8000/api/v1";
 const WS_BASE_URL = "ws://localhost:8000";
+const utf8Decoder = new TextDecoder();
 
 export interface RiskData {
   id: number;
@@ -54,6 +55,7 @@ export class APIService {
 
   private initializeEventSystem() {
     this.listeners.set("risk-update", []);
+    this.listeners.set("risk-batch", []);
     this.listeners.set("connected", []);
     this.listeners.set("disconnected", []);
     this.listeners.set("error", []);
@@ -69,6 +71,8 @@ export class APIService {
       try {
         this.updateConnectionStatus("connecting");
         this.ws = new WebSocket(`${WS_BASE_URL}/ws/risk-stream`);
+        // Binary frames (WS_BINARY_FRAMES on the backend) carry UTF-8 JSON
+        this.ws.binaryType = "arraybuffer";
 
         // Connection timeout
         const connectionTimeout = setTimeout(() => {
@@ -98,19 +102,30 @@ export class APIService {
             }
 
             // Try to parse as JSON (could be risk update)
-            const msg = JSON.parse(event.data);
-
-            // Backend sends: { "type": "risk_update", "data": { ...RiskData } }
-            // Handle both the wrapped format and the legacy flat format.
-            let riskPayload: RiskData | null = null;
-            if (msg.type === "risk_update" && msg.data) {
-              riskPayload = msg.data as RiskData;
+            const text =
+              typeof event.data === "string"
+                ? event.data
+                : utf8Decoder.decode(event.data as ArrayBuffer);
+            const msg = JSON.parse(text);
+
+            // Backend sends: { "type": "risk_batch", "data": [ ...RiskData ] }
+            // for streamed risks, or { "type": "risk_update", "data": { ...RiskData } }.
+            // Handle both, plus the legacy flat format.
+            let riskPayloads: RiskData[] = [];
+            if (msg.type === "risk_batch" && Array.isArray(msg.data)) {
+              riskPayloads = msg.data as RiskData[];
+            } else if (msg.type === "risk_update" && msg.data) {
+              riskPayloads = [msg.data as RiskData];
             } else if (msg.entity_id && msg.risk_score !== undefined) {
               // Legacy flat format (fallback)
-              riskPayload = msg as RiskData;
+              riskPayloads = [msg as RiskData];
             }
 
-            if (riskPayload) {
+            if (riskPayloads.length === 0) return;
+            // "risk-batch" delivers a whole frame (oldest first) in one call,
+            // so listeners can update state once per frame instead of per row
+            this.emit("risk-batch", riskPayloads);
+            for (const riskPayload of riskPayloads) {
               if (onRiskUpdate) onRiskUpdate(riskPayload);
               this.emit("risk-update", riskPayload);
             }